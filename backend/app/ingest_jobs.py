@@ -0,0 +1,53 @@
+"""
+Bulk load jobs into the backend's job store from NDJSON feeds, one {"id", "title", "description"} object per line.
+Same pipeline as POST /api/jobs/ingest: duplicates (by content hash) are dropped, each batch is tokenised together
+and written in transactions of job_store_batch_size, and the counts and throughput (jobs per second) are printed.
+
+Run from the backend/app directory: python ingest_jobs.py jobs.ndjson [more.ndjson ...]  (or - for stdin)
+"""
+import argparse
+import json
+import sys
+
+from ml.config import job_store_db_path, job_ingest_batch_size
+from ml.job_ingest import JobIngest
+from ml.job_store import JobStore
+from ml.parallel_preprocessing import shutdown_pool
+
+
+def ingest_file(ingest: JobIngest, path: str):
+    stream = sys.stdin.buffer if path == "-" else open(path, 'rb')
+    try:
+        for line in stream:
+            ingest.add_line(line)
+            if ingest.batch_ready():
+                ingest.write_batch()
+                print(f"  {ingest.counts['received']} jobs read...", file=sys.stderr)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load NDJSON job feeds into the job store")
+    parser.add_argument("paths", nargs="+", help="NDJSON files to ingest, - reads stdin")
+    parser.add_argument("--db", default=job_store_db_path, help=f"job store SQLite file (default {job_store_db_path})")
+    parser.add_argument("--batch-size", type=int, default=job_ingest_batch_size, help="jobs parsed and tokenised together")
+    args = parser.parse_args()
+
+    store = JobStore(args.db)
+    ingest = JobIngest(store, batch_size=args.batch_size)
+
+    try:
+        for path in args.paths:
+            ingest_file(ingest, path)
+        ingest.flush()
+    finally:
+        store.close()
+        shutdown_pool()
+
+    print(json.dumps(ingest.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
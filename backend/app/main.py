@@ -146,27 +146,104 @@
 #     # Run the application with desired config
 #     main(config)
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+import asyncio
 import tempfile
 import os
-from pydantic import BaseModel
-from typing import Dict, List
+from functools import partial
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple, Union
 import json
 
 from ml.balance_cv_weight import flatten_analysis
-from ml.tfidf import TFIDFFromScratch 
-from ml.job_matcher import calculate_similarity_results
-from ml.cv_parser import extract_cv_text
-from ml.cv_analysis import CVAnalyser
+from ml.tfidf import preprocess_cache
+from ml.job_matcher import cv_chunk_size, match_cv_against_index, match_cvs_against_index
+from ml.job_index import get_job_index, get_job_subset
+from ml.job_store import get_job_store
+from ml.job_ingest import JobIngest
+from ml.parallel_preprocessing import shutdown_pool
+from ml.analysis_pool import analyse_pdf, analyse_text, analyse_texts, extract_pdf_text, get_analyser, get_cv_executor, get_matching_executor, shutdown_executors
+from ml.analysis_cache import analysis_cache, new_pdf_hash
+from ml.result_sink import result_writer
+from ml.pdf_extractors import pdf_extractors
+from ml.config import pdf_extractor_backend, analysis_executor_mode
+from ml.config import max_concurrent_analyses, max_concurrent_matches, pdf_in_memory_max_bytes
+from ml.config import max_upload_bytes, upload_chunk_size, multipart_overhead_bytes
 from ml.exceptions import CVAnalysisError, PDFPassingError, InsufficientDataError
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the spaCy model once the server starts rather than on import, spawned worker processes re-import
+    # this module and shouldn't each load one. Off the event loop so startup doesn't block it
+    await asyncio.to_thread(get_analyser)
+    # Same for the job store, which loads every stored job into its index, so requests only ever see it built
+    await asyncio.to_thread(get_job_store)
+    # Analyses are persisted behind the response by one writer task on this event loop
+    result_writer.start()
+    yield
+    # Write out whatever results are still queued before the process goes
+    await result_writer.stop()
+    # Stop the preprocessing, analysis and matching workers so they don't outlive the API
+    shutdown_pool()
+    shutdown_executors()
+
 app = FastAPI(
     title="Career Co-Pilot CV Analysis API",
     description="ML-powered CV analysis service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+def _upload_too_large_message() -> str:
+    """Detail of every 413 response, built from the configured limit"""
+    return f"File size too large. Maximum size is {max_upload_bytes / (1024 * 1024):g}MB."
+
+class UploadSizeLimitMiddleware:
+    """
+    Stops reading a CV upload as soon as its body passes the limit, instead of letting the multipart
+    parser spool the whole thing first. Uploads that declare a larger Content-Length aren't read at all.
+    """
+    def __init__(self, app, paths, max_body_bytes):
+        self.app = app
+        self.paths = set(paths)
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            response = JSONResponse(status_code=413, content={"detail": _upload_too_large_message()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # FastAPI re-raises HTTPExceptions from body parsing, so this becomes a normal 413 response
+                if received > self.max_body_bytes:
+                    raise HTTPException(status_code=413, detail=_upload_too_large_message())
+
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+# Added before CORS so CORS stays the outer middleware and its headers are on 413 responses too
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    paths=["/api/cv/analyze"],
+    max_body_bytes=max_upload_bytes + multipart_overhead_bytes
 )
 
 # Configure CORS for Next.js frontend
@@ -181,9 +258,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize CV analyser (singleton pattern)
-cv_analyser = CVAnalyser()
-tfidf = TFIDFFromScratch()
+# Concurrency limits for the CPU-heavy endpoints, requests beyond them wait for a free slot
+analysis_slots = asyncio.Semaphore(max_concurrent_analyses)
+matching_slots = asyncio.Semaphore(max_concurrent_matches)
+
+async def run_cpu_bound(slots, executor, func, *args):
+    """Run a CPU-bound function on a dedicated executor so the event loop keeps serving other requests"""
+    async with slots:
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+async def analyse_upload(pdf_source, extractor: Optional[str]) -> dict:
+    """
+    Extract and analyse an uploaded CV under one analysis slot. With analyses in worker processes (the default)
+    the pages are extracted from this process, so multi-page PDFs are still split over the page pool, and only
+    the text is sent to a worker. In thread mode both halves run on one analysis thread.
+    """
+    if analysis_executor_mode != "process":
+        return await run_cpu_bound(analysis_slots, get_cv_executor(), analyse_pdf, pdf_source, extractor)
+
+    async with analysis_slots:
+        cv_text = await asyncio.to_thread(extract_pdf_text, pdf_source, extractor)
+        result = await asyncio.get_running_loop().run_in_executor(get_cv_executor(), analyse_text, cv_text)
+
+    return {"cv_text": cv_text, **result}
 
 @app.get("/")
 async def root():
@@ -199,12 +296,16 @@ async def health_check():
     """Detailed health check"""
     try:
         # Test if spaCy model is loaded
-        test_doc = cv_analyser.nlp("test")
+        test_doc = get_analyser().nlp("test")
 
         return {
             "status": "healthy",
             "spacy_model": "loaded",
-            "model_name": "en_core_web_sm"
+            "model_name": "en_core_web_sm",
+            "preprocess_cache": preprocess_cache.stats(),
+            "analysis_cache": await asyncio.to_thread(analysis_cache.stats),
+            "result_sink": result_writer.stats(),
+            "job_store": get_job_store().stats()
         }
     except Exception as e:
         return JSONResponse(
@@ -215,13 +316,93 @@ async def health_check():
             }
         )
 
+def _analysis_response(filename: str, file_size: int, result: dict, cached: bool):
+    return JSONResponse(
+        status_code=200,
+        content={
+            "success": True,
+            "data": result["analysis"],
+            "metadata": {
+                "filename": filename,
+                "file_size": file_size,
+                "text_length": result["text_length"],
+                # Stages that ran out of time and returned partial results (empty when complete)
+                "partial": bool(result["stages_over_budget"]),
+                "stages_over_budget": result["stages_over_budget"],
+                # True when the same PDF was analysed before and the stored analysis was returned
+                "cached": cached
+            }
+        }
+    )
+
+async def _read_pdf_upload(file: UploadFile) -> Tuple[Union[bytes, str], int, str]:
+    """
+    Read the upload in fixed-size chunks, never holding more than max_upload_bytes.
+    Junk is rejected on the first chunk (no %PDF- header) and oversized files as soon as they pass the limit.
+    Uploads stay in memory up to pdf_in_memory_max_bytes, past that they're spooled to a temp file and
+    the remaining chunks streamed straight there. Returns the PDF (bytes or temp file path), size and hash.
+    """
+    buffer = bytearray()
+    temp_file = None
+    size = 0
+    pdf_hash = new_pdf_hash()
+
+    try:
+        while chunk := await file.read(upload_chunk_size):
+            # The PDF header has to be within the first 1024 bytes
+            if not size and b"%PDF-" not in chunk[:1024]:
+                raise HTTPException(
+                    status_code=400,
+                    detail="File is not a valid PDF. Please upload a PDF CV."
+                )
+
+            size += len(chunk)
+            if size > max_upload_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=_upload_too_large_message()
+                )
+
+            pdf_hash.update(chunk)
+
+            if temp_file is None and size > pdf_in_memory_max_bytes:
+                # A named file rather than a SpooledTemporaryFile, analysis worker processes open the PDF by path
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                temp_file.write(buffer)
+                buffer = None
+
+            if temp_file is None:
+                buffer += chunk
+            else:
+                temp_file.write(chunk)
+
+    except BaseException:
+        # Rejected or interrupted part way through, don't leave the spooled part behind
+        if temp_file is not None:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        raise
+
+    if not size:
+        raise HTTPException(
+            status_code=400,
+            detail="Uploaded file is empty. Please upload a PDF CV."
+        )
+
+    if temp_file is None:
+        return bytes(buffer), size, pdf_hash.hexdigest()
+
+    temp_file.close()
+    return temp_file.name, size, pdf_hash.hexdigest()
+
 @app.post("/api/cv/analyze")
-async def analyze_cv(file: UploadFile = File(...)):
+async def analyze_cv(file: UploadFile = File(...), extractor: Optional[str] = Query(default=None)):
     """
     Analyze a CV file and return structured analysis results.
     
     Args:
         file: PDF file of the CV
+        extractor: PDF text extractor backend ("pdfplumber" or "pdfminer"), defaults to pdf_extractor_backend
         
     Returns:
         JSON object containing:
@@ -240,43 +421,57 @@ async def analyze_cv(file: UploadFile = File(...)):
             detail="Only PDF files are supported. Please upload a PDF CV."
         )
     
-    # Validate file size (10MB max)
-    if file.size and file.size > 10 * 1024 * 1024:
+    # Validate the extractor backend
+    extractor = extractor or pdf_extractor_backend
+    if extractor not in pdf_extractors:
         raise HTTPException(
             status_code=400,
-            detail="File size too large. Maximum size is 10MB."
+            detail=f"Unknown PDF extractor '{extractor}'. Available: {', '.join(pdf_extractors)}"
+        )
+    
+    # Validate file size (max_upload_bytes) when the client told us, otherwise the chunked read below enforces it
+    if file.size and file.size > max_upload_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail=_upload_too_large_message()
         )
     
-    # Create temporary file to store uploaded PDF
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            # Write uploaded file to temp location
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
+        # Only very large uploads come back as a temp file path, removed again once the request is done
+        pdf_source, file_size, pdf_hash = await _read_pdf_upload(file)
+        temp_file_path = pdf_source if isinstance(pdf_source, str) else None
+
         try:
-            # Extract text from PDF
-            cv_text = extract_cv_text(temp_file_path)
+            # Same PDF analysed before (with the same extractor, model, taxonomy and patterns)? Then skip extraction and spaCy
+            content_hash = f"{pdf_hash}:{extractor}"
+            # The cache is backed by SQLite, so lookups and writes run on a thread rather than the event loop
+            cached_result = await asyncio.to_thread(analysis_cache.get, content_hash)
+            if cached_result is not None:
+                return _analysis_response(file.filename, file_size, cached_result, cached=True)
+
+            # Extract text from PDF and analyze CV on the dedicated CV executor (worker processes or threads),
+            # each analysis stage on its own time budget so pathological text can't hold the request
+            pipeline_result = await analyse_upload(pdf_source, extractor)
+            analysis_results = pipeline_result["analysis"]
+
+            # Partial results depend on timing, only complete analyses are worth serving again
+            cached_result = {
+                "analysis": analysis_results,
+                "text_length": len(pipeline_result["cv_text"]),
+                "stages_over_budget": pipeline_result["stages_over_budget"]
+            }
+            if not cached_result["stages_over_budget"]:
+                await asyncio.to_thread(analysis_cache.put, content_hash, cached_result)
+
+            # Persisted by the background writer, the response doesn't wait for the disk
+            result_writer.submit({
+                "filename": file.filename,
+                "content_hash": content_hash,
+                "extractor": extractor,
+                "analysis": analysis_results
+            })
             
-            # Analyze CV
-            analysis_results = cv_analyser.analyse_cv_test(cv_text)
-
-            with open('analysis_results.json', 'w') as f:
-                json.dump(analysis_results, f, indent=4)
-            
-            return JSONResponse(
-                status_code=200,
-                content={
-                    "success": True,
-                    "data": analysis_results,
-                    "metadata": {
-                        "filename": file.filename,
-                        "file_size": len(content),
-                        "text_length": len(cv_text)
-                    }
-                }
-            )
+            return _analysis_response(file.filename, file_size, cached_result, cached=False)
             
         except PDFPassingError as e:
             raise HTTPException(
@@ -294,32 +489,216 @@ async def analyze_cv(file: UploadFile = File(...)):
                 detail=f"Analysis error: {str(e)}"
             )
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
+            # Clean up temporary file (only created for very large uploads)
+            if temp_file_path and os.path.exists(temp_file_path):
                 os.unlink(temp_file_path)
                 
+    except HTTPException:
+        # Already has the right status (413, 400 for bad PDFs), don't turn it into a 500
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Unexpected error processing CV: {str(e)}"
         )
 
+class BatchCVText(BaseModel):
+    # Caller's own reference for the CV, echoed back on its result
+    cv_id: str
+    text: str
+
+class BatchAnalyzeRequest(BaseModel):
+    cvs: List[BatchCVText]
+    # Optional nlp.pipe batch size, falling back to nlp_batch_size in config
+    batch_size: Optional[int] = Field(default=None, ge=1)
+    # Analyse every CV as its own task on the analysis executor instead of one nlp.pipe stream
+    use_threads: bool = False
+
+@app.post("/api/cv/analyze/batch")
+async def analyze_cv_batch(request: BatchAnalyzeRequest):
+    """
+    Analyse many already extracted CV texts in one go, e.g. bulk re-analysis after a
+    taxonomy change. The texts are streamed through nlp.pipe instead of one nlp() call each.
+    Runs on the CV executor under the same analysis slots as /api/cv/analyze.
+    """
+    if not request.cvs:
+        raise HTTPException(
+            status_code=400,
+            detail="No CV texts provided in the request"
+        )
+
+    try:
+        texts = [cv.text for cv in request.cvs]
+
+        if request.use_threads:
+            # One task (and one slot) per CV, so a large batch spreads over every analysis worker
+            analyses = await asyncio.gather(*(
+                run_cpu_bound(analysis_slots, get_cv_executor(), analyse_text, text)
+                for text in texts
+            ))
+        else:
+            analyses = await run_cpu_bound(analysis_slots, get_cv_executor(), analyse_texts, texts, request.batch_size)
+    except CVAnalysisError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Analysis error: {str(e)}"
+        )
+
+    return {
+        "success": True,
+        "results": [
+            {
+                "cv_id": cv.cv_id,
+                "data": result["analysis"],
+                # Same flags as the single CV endpoint, plus how long each stage took
+                "partial": bool(result["stages_over_budget"]),
+                "stages_over_budget": result["stages_over_budget"],
+                "stage_timings": result["stage_timings"]
+            }
+            for cv, result in zip(request.cvs, analyses)
+        ]
+    }
+
 """
 Request + response + JobMatchResult classes for /match-job endpoint so the FastAPI
 endpoint knows what the request and response should look like
 """
+# Job ids keep the caller's type, integer ids from the frontend's jobs table or string ids from feeds
+JobId = Union[int, str]
+
+class JobRecord(BaseModel):
+    job_id: JobId
+    title: Optional[str] = None
+    description: str
+
+class UpsertJobsRequest(BaseModel):
+    jobs: List[JobRecord]
+
+class RemoveJobsRequest(BaseModel):
+    job_ids: List[JobId]
+
 class MatchJobRequest(BaseModel):
     cv_analysis: Dict
-    job_descriptions: List[str]
+    # Stored jobs to match against (see /api/jobs), every stored job when left out.
+    # IDF is calculated over these jobs only, so scores match sending their descriptions instead
+    job_ids: Optional[List[JobId]] = None
+    # Optional hash_job(title, description) of the caller's copy of each job in job_ids (same order),
+    # stored jobs with a different hash are reported back in stale_job_ids
+    job_content_hashes: Optional[List[str]] = None
+    # Legacy: the full job texts, matched instead of the job store and identified by position
+    job_descriptions: Optional[List[str]] = None
+    # Optional retrieval limits, by default every job is returned in job order
+    top_k: Optional[int] = Field(default=None, ge=1)
+    min_similarity: Optional[float] = Field(default=None, ge=0, le=1)
 
 class JobMatchResult(BaseModel):
-    job_index: int
+    job_id: JobId
+    # 1-based position in job_descriptions, only set on the legacy path
+    job_index: Optional[int] = None
     similarity: float
     match_quality: str
 
 class MatchJobResponse(BaseModel):
     success: bool
     results: List[JobMatchResult]
+    # Number of jobs scored before top_k/min_similarity, so callers know how many were left out
+    total_scored: int
+    # Requested job_ids the job store doesn't have, upsert them to /api/jobs and match again
+    missing_job_ids: List[JobId] = []
+    # Requested job_ids stored with different content than the caller sent hashes for, upsert them again
+    stale_job_ids: List[JobId] = []
+
+def _match_single_cv(request: MatchJobRequest):
+    flattened_analysis = flatten_analysis(request.cv_analysis)
+    missing_job_ids, stale_job_ids = [], []
+
+    if request.job_descriptions:
+        # Fitted once per job corpus and shared between requests, only the CV is transformed here
+        job_index = get_job_index(request.job_descriptions)
+    else:
+        # Stored jobs were tokenised when they were upserted, only the CV is transformed here
+        job_index = get_job_store().snapshot()
+        if request.job_ids is not None:
+            # IDF over just the requested jobs, scored as if only they had been sent with the CV
+            job_index, missing_job_ids = get_job_subset(job_index, request.job_ids)
+        if request.job_content_hashes is not None:
+            stale_job_ids = get_job_store().stale_job_ids(request.job_ids, request.job_content_hashes)
+
+    total_scored = len(job_index)
+    if not total_scored:
+        # None of the requested jobs are stored yet, the caller can upsert missing_job_ids and try again
+        return [], 0, missing_job_ids, stale_job_ids
+
+    results = match_cv_against_index(
+            flattened_analysis,
+            job_index,
+            top_k=request.top_k,
+            min_similarity=request.min_similarity
+            )
+
+    return results, total_scored, missing_job_ids, stale_job_ids
+
+def _job_match_result(result, legacy: bool) -> JobMatchResult:
+    return JobMatchResult(
+        job_id=result.job_id,
+        job_index=result.job_index if legacy else None,
+        similarity=float(result.similarity),
+        match_quality=result.match_quality
+        )
+
+@app.post("/api/jobs")
+async def upsert_jobs(request: UpsertJobsRequest):
+    """
+    Add or update jobs in the backend's job store. Each job is tokenised once here (unchanged jobs are
+    skipped) and its term counts stored, so /api/match-job only needs the job ids from then on.
+    """
+    jobs = [(job.job_id, job.title, job.description) for job in request.jobs]
+
+    try:
+        counts = await run_cpu_bound(matching_slots, get_matching_executor(), get_job_store().upsert_jobs, jobs)
+    except Exception as e:
+        raise HTTPException(
+                status_code=500,
+                detail=f"Error storing jobs: {str(e)}"
+                )
+
+    return {"success": True, **counts, "total_jobs": len(get_job_store())}
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """Ids of every stored job, callers compare them with their own jobs and remove the ones they've deleted"""
+    return {"success": True, "job_ids": await asyncio.to_thread(get_job_store().job_ids)}
+
+@app.post("/api/jobs/remove")
+async def remove_jobs(request: RemoveJobsRequest):
+    """Remove jobs from the job store so they're no longer matched or counted in the IDF values"""
+    removed = await asyncio.to_thread(get_job_store().remove_jobs, request.job_ids)
+    return {"success": True, "removed": removed, "total_jobs": len(get_job_store())}
+
+@app.post("/api/jobs/ingest")
+async def ingest_jobs(request: Request):
+    """
+    Bulk load jobs from a feed, streamed as NDJSON (one {"id", "title", "description"} object per line).
+    Chunks are only queued as they arrive, each batch is split into lines, parsed, deduplicated (by content hash),
+    tokenised together and written on the matching threads. Returns the counts and jobs per second.
+    """
+    ingest = JobIngest(get_job_store())
+
+    try:
+        async for chunk in request.stream():
+            ingest.add_chunk(chunk)
+
+            if ingest.batch_ready():
+                await run_cpu_bound(matching_slots, get_matching_executor(), ingest.write_batch)
+
+        await run_cpu_bound(matching_slots, get_matching_executor(), ingest.flush)
+    except Exception as e:
+        raise HTTPException(
+                status_code=500,
+                detail=f"Error ingesting jobs: {str(e)}. Completed batches were kept: {ingest.report()}"
+                )
+
+    return {"success": True, **ingest.report()}
 
 @app.post("/api/match-job")
 async def generate_similarity(request: MatchJobRequest):
@@ -330,43 +709,152 @@ async def generate_similarity(request: MatchJobRequest):
     numpy would have been much faster!)
     """
     try:
-        if not request.job_descriptions:
+        if not request.cv_analysis:
             raise HTTPException(
                     status_code=400,
-                    detail="No job descriptions were provided in the request"
+                    detail="No CV analysis provided in the request"
                     )
 
-        if not request.cv_analysis:
+        if not request.job_descriptions and request.job_ids is None and not len(get_job_store()):
             raise HTTPException(
                     status_code=400,
-                    detail="No CV analysis provided in the request"
+                    detail="No job descriptions were provided and the job store is empty"
                     )
 
-        flattened_analysis = flatten_analysis(request.cv_analysis)
-
-        all_documents = [flattened_analysis] + request.job_descriptions
-
-        results, vocabulary, tfidf_matrix = calculate_similarity_results(all_documents)
+        # Scored on the matching threads so large corpora don't stall the event loop
+        if request.job_content_hashes is not None and (
+                request.job_ids is None or len(request.job_content_hashes) != len(request.job_ids)):
+            raise HTTPException(
+                    status_code=400,
+                    detail="job_content_hashes needs one hash for each of the job_ids"
+                    )
 
-        job_results = [
-            JobMatchResult(
-                job_index=result.job_index,
-                similarity=float(result.similarity),
-                match_quality=result.match_quality
-                ) for result in results
-        ]
+        results, total_scored, missing_job_ids, stale_job_ids = await run_cpu_bound(
+                matching_slots, get_matching_executor(), _match_single_cv, request
+                )
 
+        legacy = bool(request.job_descriptions)
         return MatchJobResponse(
                 success=True,
-                results=job_results
+                results=[_job_match_result(result, legacy) for result in results],
+                total_scored=total_scored,
+                missing_job_ids=missing_job_ids,
+                stale_job_ids=stale_job_ids
                 )
 
+    except HTTPException:
+        # Already has the right status, don't turn it into a 500
+        raise
     except Exception as e:
         raise HTTPException(
                 status_code=500,
                 detail=f"Error calcualting similarity results: {str(e)}"
                 )
 
+class BatchCV(BaseModel):
+    # Caller's own reference for the CV (e.g. the user id), echoed back on its result line
+    cv_id: str
+    cv_analysis: Dict
+
+class BatchMatchJobRequest(BaseModel):
+    cvs: List[BatchCV]
+    # Legacy: the full job texts, every stored job is matched when left out
+    job_descriptions: Optional[List[str]] = None
+    top_k: Optional[int] = Field(default=None, ge=1)
+    min_similarity: Optional[float] = Field(default=None, ge=0, le=1)
+
+@app.post("/api/match-job/batch")
+async def generate_similarity_batch(request: BatchMatchJobRequest):
+    """
+    Batch version of /api/match-job for re-matching many users after the job corpus changes.
+    Every CV is scored against the shared job index with sparse matrix-matrix products and the
+    results are streamed back as NDJSON, one line per CV in request order, e.g.
+    {"cv_id": "...", "success": true, "results": [...], "total_scored": 120}
+    A CV that can't be matched gets {"cv_id": "...", "success": false, "error": "..."} instead.
+    Matches against the job store unless job_descriptions are sent.
+    """
+    if not request.job_descriptions and not len(get_job_store()):
+        raise HTTPException(
+                status_code=400,
+                detail="No job descriptions were provided and the job store is empty"
+                )
+
+    if not request.cvs:
+        raise HTTPException(
+                status_code=400,
+                detail="No CV analyses provided in the request"
+                )
+
+    legacy = bool(request.job_descriptions)
+
+    try:
+        if legacy:
+            job_index = await run_cpu_bound(matching_slots, get_matching_executor(), get_job_index, request.job_descriptions)
+        else:
+            job_index = await run_cpu_bound(matching_slots, get_matching_executor(), get_job_store().snapshot)
+    except CVAnalysisError as e:
+        raise HTTPException(
+                status_code=400,
+                detail=f"Error fitting job descriptions: {str(e)}"
+                )
+
+    # Flatten up front so a malformed analysis only fails its own line
+    flattened_analyses = []
+    flatten_errors = {}
+    for position, cv in enumerate(request.cvs):
+        try:
+            flattened_analyses.append(flatten_analysis(cv.cv_analysis))
+        except Exception as e:
+            flatten_errors[position] = f"Invalid CV analysis: {str(e)}"
+            flattened_analyses.append("")
+
+    def match_chunk(start, stop):
+        """NDJSON lines for CVs start:stop, scored together with one sparse matrix-matrix product"""
+        lines = []
+        matches = match_cvs_against_index(
+                flattened_analyses[start:stop],
+                job_index,
+                top_k=request.top_k,
+                min_similarity=request.min_similarity
+                )
+
+        for offset, results in matches:
+            position = start + offset
+            cv_id = request.cvs[position].cv_id
+
+            if position in flatten_errors or results is None:
+                line = {
+                    "cv_id": cv_id,
+                    "success": False,
+                    "error": flatten_errors.get(position, "CV profile does not contain relevant information for analysis")
+                }
+            else:
+                line = {
+                    "cv_id": cv_id,
+                    "success": True,
+                    "results": [
+                        {
+                            "job_id": result.job_id,
+                            "job_index": result.job_index if legacy else None,
+                            "similarity": float(result.similarity),
+                            "match_quality": result.match_quality
+                        } for result in results
+                    ],
+                    "total_scored": len(job_index)
+                }
+
+            lines.append(json.dumps(line) + "\n")
+
+        return "".join(lines)
+
+    async def result_lines():
+        # Each chunk takes a matching slot on the matching threads, other requests get a turn between chunks
+        chunk_size = cv_chunk_size(job_index)
+        for start in range(0, len(flattened_analyses), chunk_size):
+            yield await run_cpu_bound(matching_slots, get_matching_executor(), match_chunk, start, start + chunk_size)
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
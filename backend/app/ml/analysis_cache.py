@@ -0,0 +1,146 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import spacy
+
+from . import config
+from .cache import LRUCache
+from .patterns import section_patterns, contact_patterns, experience_patterns, education_patterns
+from .config import (
+    spacy_model_name, spacy_excluded_components,
+    analysis_cache_max_entries, analysis_cache_max_bytes, analysis_cache_db_path, analysis_cache_db_max_entries
+)
+
+
+def _analysis_version() -> str:
+    """
+    Fingerprint of everything that decides what an analysis returns: the spaCy model and its version,
+    the skill taxonomy and the regex patterns. Any change gives a new version, so old entries stop matching.
+    """
+    inputs = {
+        "spacy": spacy.__version__,
+        "model": spacy_model_name,
+        "model_version": spacy.util.get_package_version(spacy_model_name),
+        "excluded_components": spacy_excluded_components,
+        "taxonomy": {
+            name: sorted(getattr(config, name))
+            for name in ("programming_languages", "frameworks_libraries", "databases", "cloud_tools", "experience_indicators")
+        },
+        "patterns": [section_patterns, contact_patterns, experience_patterns, education_patterns]
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+analysis_version = _analysis_version()
+
+
+def new_pdf_hash():
+    """Incremental hash_pdf, for uploads hashed chunk by chunk as they're read"""
+    return hashlib.sha256()
+
+
+def hash_pdf(content: bytes) -> str:
+    """Content address of an uploaded PDF, the same bytes always give the same key"""
+    pdf_hash = new_pdf_hash()
+    pdf_hash.update(content)
+    return pdf_hash.hexdigest()
+
+
+def _json_size(value) -> int:
+    # Approximate memory cost of a cached analysis, sys.getsizeof only sees the outer dict
+    return len(json.dumps(value))
+
+
+class AnalysisCache:
+    """
+    Finished CV analyses keyed by PDF hash and analysis version. Lookups try an in-memory LRU first and
+    then, if analysis_cache_db_path is set, a SQLite file that survives restarts and is shared by workers.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, version: str = analysis_version,
+                 max_entries: int = analysis_cache_max_entries, max_bytes: int = analysis_cache_max_bytes,
+                 db_max_entries: int = analysis_cache_db_max_entries):
+        # One version per cache, so the in-memory entries are keyed by the PDF hash alone
+        self.version = version
+        self.memory = LRUCache(max_entries, max_bytes, sizeof=_json_size)
+        self.db_max_entries = db_max_entries
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "content_hash TEXT NOT NULL, version TEXT NOT NULL, result TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (content_hash, version))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS analysis_cache_created_at ON analysis_cache (created_at)")
+
+        # Entries from an older model, taxonomy or pattern version can never be hit again
+        with self._db:
+            self._db.execute("DELETE FROM analysis_cache WHERE version != ?", (self.version,))
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        """Cached analysis for the PDF hash, or None if it has to be analysed"""
+        result = self.memory.get(content_hash)
+        if result is not None or self._db is None:
+            return result
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT result FROM analysis_cache WHERE content_hash = ? AND version = ?",
+                (content_hash, self.version)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        # Promote to memory so the next hit doesn't touch the disk
+        result = json.loads(row[0])
+        self.memory.put(content_hash, result)
+        return result
+
+    def put(self, content_hash: str, result: dict):
+        """Store a finished analysis, treat it as read-only from here on as hits share the same object"""
+        self.memory.put(content_hash, result)
+
+        if self._db is None:
+            return
+
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (content_hash, version, result, created_at) VALUES (?, ?, ?, ?)",
+                (content_hash, self.version, json.dumps(result), time.time())
+            )
+            # Keep the file bounded, dropping the oldest analyses first
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE rowid IN ("
+                "SELECT rowid FROM analysis_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.db_max_entries,)
+            )
+
+    def clear(self):
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock, self._db:
+                self._db.execute("DELETE FROM analysis_cache")
+
+    def stats(self):
+        """Counters for health checks"""
+        stats = {"version": self.version, "memory": self.memory.stats()}
+        if self._db is not None:
+            with self._db_lock:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        return stats
+
+
+# Shared by every request in the API process
+analysis_cache = AnalysisCache(analysis_cache_db_path)
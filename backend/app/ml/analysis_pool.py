@@ -0,0 +1,151 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .config import analysis_executor_mode, analysis_workers, matching_workers
+from .budget import StageBudget
+from .cv_parser import disable_page_parallelism, extract_cv_text, shutdown_page_pool
+
+# Executors shared by every request, created on first use
+_thread_executor = None
+_matching_executor = None
+_process_executor = None
+_executor_lock = threading.Lock()
+
+# The CVAnalyser of this process, loaded once (in the API process, or in each analysis worker process)
+_analyser = None
+_analyser_lock = threading.Lock()
+
+
+def get_analyser():
+    """This process's CVAnalyser, loading the spaCy model on first use"""
+    global _analyser
+
+    with _analyser_lock:
+        if _analyser is None:
+            # Imported here so worker processes only pay for spaCy when they start analysing
+            from .cv_analysis import CVAnalyser
+            _analyser = CVAnalyser()
+
+        return _analyser
+
+
+def _init_analysis_worker():
+    """
+    Runs as each analysis worker process starts. The workers are handed text that the API process already
+    extracted (see extract_pdf_text), so none of them starts a page pool of its own.
+    """
+    disable_page_parallelism()
+    get_analyser()
+
+
+def analyse_pdf(pdf_source, extractor: str = None) -> dict:
+    """
+    Extract and analyse a CV (PDF bytes or a file path) in one go, the CPU-heavy half of /api/cv/analyze.
+    Runs inside whichever executor get_cv_executor() returns, so it only takes and returns plain data.
+    """
+    cv_text = extract_cv_text(pdf_source, backend=extractor)
+
+    budget = StageBudget()
+    analysis_results = get_analyser().analyse_cv_test(cv_text, budget)
+
+    return {
+        "cv_text": cv_text,
+        "analysis": analysis_results,
+        "stages_over_budget": budget.exceeded
+    }
+
+
+def extract_pdf_text(pdf_source, extractor: str = None) -> str:
+    """
+    The extraction half of /api/cv/analyze when analyses run in worker processes, called on a thread of the
+    API process. Every page goes to the page pool, multi-page PDFs split over its workers, so this thread
+    mostly waits and the analysis worker is only sent the text.
+    """
+    return extract_cv_text(pdf_source, backend=extractor, offload=True)
+
+
+def analyse_text(cv_text: str) -> dict:
+    """One already extracted CV text on its own stage budget, e.g. each CV of /api/cv/analyze/batch"""
+    budget = StageBudget()
+    analysis_results = get_analyser().analyse_cv_test(cv_text, budget)
+
+    return {
+        "analysis": analysis_results,
+        "stages_over_budget": budget.exceeded,
+        "stage_timings": budget.timings
+    }
+
+
+def analyse_texts(cv_texts: list, batch_size: int = None) -> list:
+    """
+    Already extracted CV texts streamed through one nlp.pipe call, each with its own stage budget.
+    Always n_process=1, this runs in an analysis worker or API thread and forking spaCy processes
+    from a process that is already running threads isn't safe.
+    """
+    return get_analyser().analyse_cvs(cv_texts, batch_size=batch_size, n_process=1)
+
+
+def get_thread_executor():
+    """
+    Shared thread pool for analyses in the API process. Threads share the one loaded spaCy model,
+    which is safe because CVAnalyser keeps no per-request state.
+    """
+    global _thread_executor
+
+    with _executor_lock:
+        if _thread_executor is None:
+            _thread_executor = ThreadPoolExecutor(max_workers=analysis_workers, thread_name_prefix='cv-analysis')
+        return _thread_executor
+
+
+def get_process_executor():
+    """Shared process pool where every worker loads its own spaCy model as it starts (see _init_analysis_worker)"""
+    global _process_executor
+
+    with _executor_lock:
+        if _process_executor is None:
+            # spawn rather than fork, forking a process that is already running threads (uvicorn) isn't safe
+            _process_executor = ProcessPoolExecutor(
+                max_workers=analysis_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_analysis_worker
+            )
+        return _process_executor
+
+
+def get_cv_executor():
+    """Executor for PDF extraction and analysis, picked by analysis_executor_mode ("process" or "thread")"""
+    if analysis_executor_mode == "process":
+        return get_process_executor()
+    return get_thread_executor()
+
+
+def get_matching_executor():
+    """
+    Small thread pool for job matching. The heavy part is numpy, which releases the GIL,
+    and the fitted job indexes are cached in this process, so threads rather than processes.
+    """
+    global _matching_executor
+
+    with _executor_lock:
+        if _matching_executor is None:
+            _matching_executor = ThreadPoolExecutor(max_workers=matching_workers, thread_name_prefix='job-matching')
+        return _matching_executor
+
+
+def shutdown_executors():
+    """Stop every analysis/matching thread and worker process, e.g. when the API shuts down"""
+    global _thread_executor, _matching_executor, _process_executor
+
+    with _executor_lock:
+        for executor in (_thread_executor, _matching_executor, _process_executor):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        _thread_executor = None
+        _matching_executor = None
+        _process_executor = None
+
+    # Page extraction pool of this process (analysis worker processes stop theirs as they exit)
+    shutdown_page_pool()
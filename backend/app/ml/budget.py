@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from .config import analysis_stage_budget_seconds
+
+
+class Stage:
+    """
+    Deadline for one analysis stage. Long-running loops call expired() every so often and stop
+    early (keeping what they have found so far) once it returns True.
+    """
+
+    def __init__(self, name: str, seconds: float):
+        self.name = name
+        self.deadline = time.perf_counter() + seconds
+        self.stopped_early = False
+
+    def expired(self) -> bool:
+        if time.perf_counter() > self.deadline:
+            self.stopped_early = True
+        return self.stopped_early
+
+
+class StageBudget:
+    """
+    Per-stage time budgets for a single CV analysis, e.g.
+
+        with budget.stage('skills') as stage:
+            skills = skill_matcher.find_by_category(text, stage)
+
+    Stages that ran out of time are listed in budget.exceeded so the API can flag the results as partial.
+    """
+
+    def __init__(self, seconds_per_stage: Optional[float] = None, overrides: Optional[Dict[str, float]] = None):
+        self.seconds_per_stage = analysis_stage_budget_seconds if seconds_per_stage is None else seconds_per_stage
+        self.overrides = overrides or {}
+        self.exceeded: List[str] = []
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        seconds = self.overrides.get(name, self.seconds_per_stage)
+        stage = Stage(name, seconds)
+        started = time.perf_counter()
+
+        try:
+            yield stage
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = elapsed
+
+            # Also flag stages that overran without getting the chance to check (e.g. one long regex call)
+            if stage.stopped_early or elapsed > seconds:
+                self.exceeded.append(name)
+
+
+# Stand-in for callers that don't pass a budget, never expires
+class _Unlimited:
+    stopped_early = False
+
+    def expired(self) -> bool:
+        return False
+
+
+unlimited = _Unlimited()
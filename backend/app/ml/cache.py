@@ -0,0 +1,77 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache, bounded by both entry count and approximate size in bytes.
+    Values are shared between callers, so treat anything returned from get() as read-only.
+    """
+
+    def __init__(self, max_entries, max_bytes, sizeof=sys.getsizeof):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value (marking it as recently used) or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries until both limits are met"""
+        size = self.sizeof(value)
+
+        # Never let a single oversized value flush the whole cache
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self.current_bytes -= existing[1]
+
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for health checks and benchmarks"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "approx_bytes": self.current_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
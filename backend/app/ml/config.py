@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -233,3 +234,101 @@ stop_words = {
     'technologies', 'startup', 'environment', 'modern', 'development'
 }
 
+
+# MATCH QUALITY
+# Lower bound of each match quality bucket (Moderate, Good, Strong and Excellent Match) on cosine similarity.
+# Rank-matched to the previous [0.12, 0.20, 0.28, 0.35] for weighted TF by benchmarks/calibrate_match_thresholds.py,
+# but that only had 2 CV profiles against the seeded and test-request job ads (110 pairs), so treat the upper
+# buckets as rough and re-run the calibration once a larger set of CVs is available.
+# The single copy: results carry their match_quality label, which is what the frontend buckets by
+match_quality_thresholds = (0.12, 0.23, 0.40, 0.47)
+
+
+# PERFORMANCE TUNING
+# Bounds for the cache of preprocessed documents (content hash -> weighted term counts) in the TF-IDF layer
+preprocess_cache_max_entries = 50_000
+preprocess_cache_max_bytes = 64 * 1024 * 1024
+
+# Parallel preprocessing of large job batches (see parallel_preprocessing.py)
+# Batches smaller than the threshold are tokenised in-process, larger ones are split into chunks for a process pool
+preprocess_workers = os.cpu_count() or 1
+preprocess_parallel_threshold = 2_000
+preprocess_chunk_size = 500
+
+# spaCy pipeline used by CVAnalyser, the analyser only reads doc.ents so everything except NER is left out
+spacy_model_name = "en_core_web_sm"
+spacy_excluded_components = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+# Defaults for batch CV analysis with nlp.pipe
+nlp_batch_size = 32
+# Only for offline callers of CVAnalyser.analyse_cvs, the API always uses 1 (its analysis executor is the parallelism)
+nlp_n_process = 1
+
+# Time each CV analysis stage (contact info, sections, skills, entities, experience, education) may take
+# before it stops and returns what it has found so far, flagged in the API response metadata
+analysis_stage_budget_seconds = 0.5
+
+# Where PDF extraction and CV analysis run, off the event loop so /health and light requests stay responsive:
+# "process" gives every worker process its own preloaded spaCy model, "thread" shares the API process's model
+# (spaCy releases the GIL for most of its work), either way throughput scales with cores without extra uvicorn workers
+analysis_executor_mode = "process"
+analysis_workers = os.cpu_count() or 1
+
+# Threads for job matching (numpy releases the GIL, and the fitted job indexes are cached in the API process)
+matching_workers = 4
+
+# Most analyses / job matches in progress at once, further requests wait for a free slot
+max_concurrent_analyses = analysis_workers
+max_concurrent_matches = matching_workers
+
+# Finished CV analyses cached by PDF hash, so re-uploading the same CV skips extraction and spaCy.
+# Set CV_ANALYSIS_CACHE_DB to a file path to also keep them on disk (SQLite) across restarts and workers
+analysis_cache_max_entries = 1_000
+analysis_cache_max_bytes = 64 * 1024 * 1024
+analysis_cache_db_path = os.environ.get("CV_ANALYSIS_CACHE_DB")
+analysis_cache_db_max_entries = 10_000
+
+# Uploads up to this size are parsed straight from memory, larger ones are spooled to a temp file as they're read.
+# Has to stay below max_upload_bytes, otherwise every upload is kept in memory
+pdf_in_memory_max_bytes = 4 * 1024 * 1024
+
+# CV uploads are read in chunks and rejected (413) as soon as they pass the limit,
+# the multipart allowance covers the form boundaries and headers around the file itself
+max_upload_bytes = 10 * 1024 * 1024
+upload_chunk_size = 64 * 1024
+multipart_overhead_bytes = 64 * 1024
+
+# PDF text extraction limits, larger or slower documents fail fast with a PDFPassingError
+pdf_max_pages = 20
+pdf_extraction_budget_seconds = 15.0
+
+# Documents with at least this many pages have their pages extracted in parallel worker processes
+pdf_parallel_extraction = True
+pdf_parallel_min_pages = 4
+pdf_extraction_workers = min(4, os.cpu_count() or 1)
+
+# PDF text extractor used when a request doesn't pick one: "pdfplumber" (full layout objects, the original)
+# or "pdfminer" (low-level text path with layout analysis tuned down), see benchmarks/bench_pdf_extractors.py
+pdf_extractor_backend = "pdfplumber"
+
+# Where finished CV analyses are kept, written behind the response by a single background task:
+# "off", "file" (the latest analysis as JSON, what analysis_results.json always held), "sqlite" (every analysis
+# as a row) or "ndjson" (every analysis as a line, rotated by size). CV_RESULT_SINK_PATH overrides the sink's file
+result_sink_kind = os.environ.get("CV_RESULT_SINK", "file")
+result_sink_path = os.environ.get("CV_RESULT_SINK_PATH")
+
+# Results waiting to be written, further ones are dropped rather than slowing responses, and the most written at once
+result_sink_queue_size = 1_000
+result_sink_batch_size = 100
+
+# The NDJSON log is rotated once it passes this size, keeping this many old logs
+result_sink_ndjson_max_bytes = 50 * 1024 * 1024
+result_sink_ndjson_backups = 5
+
+# Jobs kept by the backend with their preprocessed term counts, so /api/match-job only needs job ids.
+# CV_JOB_STORE_DB moves the SQLite file, jobs are written in transactions of up to job_store_batch_size
+job_store_db_path = os.environ.get("CV_JOB_STORE_DB", "job_store.db")
+job_store_batch_size = 1_000
+# Records parsed and tokenised together by /api/jobs/ingest and ingest_jobs.py, kept at or above
+# preprocess_parallel_threshold so a full batch of new jobs is tokenised by the preprocessing pool
+job_ingest_batch_size = 5_000
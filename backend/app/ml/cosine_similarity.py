@@ -1,5 +1,7 @@
 import numpy as np
 
+from .config import match_quality_thresholds
+
 
 def calculate_cosine_similarity(vec1, vec2, show_calculation=False): 
     """
@@ -31,18 +33,38 @@ def calculate_cosine_similarity(vec1, vec2, show_calculation=False):
 
     return cosine_similarity
 
+def calculate_cosine_similarities(matrix, vector, row_norms=None):
+    """
+    Cosine similarity between one vector and every row of a CSRMatrix in a single
+    matrix-vector product. Pass precomputed row_norms to avoid recalculating them.
+    """
+    if row_norms is None:
+        row_norms = matrix.row_norms()
+
+    # One dot product per row, then one division by the vector of magnitudes
+    dot_products = matrix.dot(vector)
+    denominators = row_norms * np.sqrt(np.sum(vector ** 2))
+
+    # Rows (or a vector) with zero magnitude get a similarity of 0
+    similarities = np.zeros(matrix.shape[0])
+    np.divide(dot_products, denominators, out=similarities, where=denominators > 0)
+
+    return similarities
+
+# Lower bound of each match quality bucket, from weakest to strongest (see match_quality_thresholds in config)
+similarity_thresholds = np.array(match_quality_thresholds)
+similarity_descriptions = np.array(["Weak Match", "Moderate Match", "Good Match", "Strong Match", "Excellent Match"])
+
+def get_similarity_descriptions(similarities):
+    """
+    Vectorised get_similarity_description, buckets a whole array of similarities at once
+    """
+    buckets = np.searchsorted(similarity_thresholds, similarities, side='right')
+    return similarity_descriptions[buckets]
+
 def get_similarity_description(cosine_similarity):
     """
     Convert similarity score to human-readable description.
-    Thresholds calibrated for comprehensive CV profiles with smart preprocessing.
-    """
-    if cosine_similarity >= 0.35:
-        return "Excellent Match"
-    elif cosine_similarity >= 0.28:
-        return "Strong Match"
-    elif cosine_similarity >= 0.20:
-        return "Good Match"
-    elif cosine_similarity >= 0.12:
-        return "Moderate Match"
-    else:
-        return "Weak Match"
+    Thresholds calibrated for comprehensive CV profiles with smart preprocessing (see similarity_thresholds).
+    """
+    return str(get_similarity_descriptions([cosine_similarity])[0])
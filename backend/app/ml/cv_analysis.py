@@ -1,27 +1,81 @@
 import spacy
 import re
-from typing import Dict, List
-from .config import programming_languages, frameworks_libraries, databases, cloud_tools, experience_indicators
-from .patterns import section_patterns, contact_patterns, experience_patterns, education_patterns
+from typing import Dict, List, Tuple
+from .config import spacy_model_name, spacy_excluded_components, nlp_batch_size, nlp_n_process
+from .skill_matcher import skill_matcher
+from .pattern_engine import classify_line, extract_contact_info, extract_experience_indicators, extract_education_info
+from .budget import StageBudget, unlimited
+from .analysis_pool import get_thread_executor
 from .exceptions import SpacyModelError
 
+class AnalysisContext:
+    """
+    Per-request state for a single analysis. Lives only for the duration of the call, so the
+    shared CVAnalyser holds nothing request specific and can analyse several CVs concurrently.
+    """
+
+    def __init__(self, text: str, doc, budget: StageBudget):
+        self.text = text
+        self.doc = doc
+        self.budget = budget
+        self.section_spans: Dict[str, List[Tuple[int, int]]] = {}
+        # Lowercased skills found in this CV, used to reject ORG/GPE entities that are really technologies
+        self.technical_skills = set()
+
 class CVAnalyser:
     def __init__(self):
-        # Load the base model
+        # Load the base model, without the components the analysis never reads (only doc.ents is used)
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-            self.all_technical_skills = []
+            self.nlp = spacy.load(spacy_model_name, exclude=spacy_excluded_components)
         except OSError:
             raise SpacyModelError(
                 "spaCy English model not found. Install with: "
-                "python -m spacy download en_core_web_sm"
+                f"python -m spacy download {spacy_model_name}"
             )
         except Exception as e:
             raise SpacyModelError(f"Failed to load spaCy model: {str(e)}")
 
-    def analyse_cv_test(self, text: str) -> Dict:
+        # The shared tok2vec only feeds listening components, if NER has its own embedding nobody needs it
+        if 'tok2vec' in self.nlp.pipe_names and not self.nlp.get_pipe('tok2vec').listening_components:
+            self.nlp.remove_pipe('tok2vec')
+
+    def analyse_cv_test(self, text: str, budget: StageBudget = None) -> Dict:
+        # Every stage gets its own time budget, stages that run out are listed in budget.exceeded
+        budget = budget if budget is not None else StageBudget()
+
         # Process the text with the loaded spaCy model
-        doc = self.nlp(text)
+        return self._analyse_doc(text, self.nlp(text), budget)
+
+    def analyse_cvs(self, texts: List[str], batch_size: int = None, n_process: int = None, use_threads: bool = False) -> List[Dict]:
+        # Every CV gets its own StageBudget, returned with its analysis so partial results can be flagged:
+        # {'analysis': ..., 'stages_over_budget': [...], 'stage_timings': {stage: seconds}}
+        # Thread-pool mode, every CV analysed as its own task on the shared analysis threads
+        if use_threads:
+            return list(get_thread_executor().map(self._analyse_with_budget, texts))
+
+        # Batch analysis, streaming every CV through nlp.pipe rather than one nlp() call at a time
+        docs = self.nlp.pipe(
+            texts,
+            batch_size=batch_size or nlp_batch_size,
+            n_process=n_process or nlp_n_process
+        )
+
+        return [self._analyse_with_budget(text, doc) for text, doc in zip(texts, docs)]
+
+    def _analyse_with_budget(self, text: str, doc=None) -> Dict:
+        budget = StageBudget()
+        analysis = self._analyse_doc(text, doc if doc is not None else self.nlp(text), budget)
+
+        return {
+            'analysis': analysis,
+            'stages_over_budget': budget.exceeded,
+            'stage_timings': budget.timings
+        }
+
+    def _analyse_doc(self, text: str, doc, budget: StageBudget = None) -> Dict:
+        # Everything this analysis needs to remember between stages, never stored on self
+        context = AnalysisContext(text, doc, budget if budget is not None else StageBudget())
+        budget = context.budget
 
         # Initialise the results variable to store the analysis results
         # Now including all the custom sections to better extract and group information
@@ -46,146 +100,123 @@ class CVAnalyser:
         }
 
         # Extract contact information
-        results['contact_info'] = self._extract_contact_info(text)
+        with budget.stage('contact_info') as stage:
+            results['contact_info'] = self._extract_contact_info(text, stage)
         
-        # Identify CV sections
-        results['sections'] = self._identify_sections(text)
+        # Identify CV sections, keeping their character offsets so entities can be taken from the full doc
+        with budget.stage('sections') as stage:
+            context.section_spans = self._identify_section_spans(text, stage)
+            results['sections'] = self._sections_from_spans(text, context.section_spans)
         
         # Enhanced skill extraction
-        results['skills'] = self._extract_skills_comprehensive(text)
+        with budget.stage('skills') as stage:
+            results['skills'] = self._extract_skills_comprehensive(text, stage)
 
-        self.all_technical_skills = [
-            skill.lower() 
-            for skill_category in results['skills'].values()  
-            for skill in skill_category  
-        ]
+        context.technical_skills = {
+            skill.lower()
+            for skill_category in results['skills'].values()
+            for skill in skill_category
+        }
         
         # Improved entity recognition with context provided for better extraction
-        results['entities'] = self._extract_entities_with_context(
-                doc,
-                results['sections'],
-                )
+        with budget.stage('entities') as stage:
+            results['entities'] = self._extract_entities_with_context(
+                    context,
+                    results['sections'],
+                    stage
+                    )
         
         # Extract experience indicators
-        results['experience_indicators'] = self._extract_experience_indicators(text)
+        with budget.stage('experience_indicators') as stage:
+            results['experience_indicators'] = self._extract_experience_indicators(text, stage)
         
         # Extract education information
-        results['education_info'] = self._extract_education_info(text)
+        with budget.stage('education_info') as stage:
+            results['education_info'] = self._extract_education_info(text, stage)
         
         # Return the results
         return results
 
-    def _extract_contact_info(self, text: str) -> Dict[str, str]:
-        # Initialise the contact_info variable to store the contact information
-        contact_info = {}
-
-        # Loop through the contact_patterns dictionary and extract the contact information using regex
-        for info_type, pattern in contact_patterns.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                # If the match is a string, store it as is, otherwise store the first match
-                contact_info[info_type] = matches[0] if isinstance(matches[0], str) else matches[0]
-
-        # Return the contact information
-        return contact_info
+    def _extract_contact_info(self, text: str, stage=unlimited) -> Dict[str, str]:
+        # First email, phone, LinkedIn and GitHub match, using the patterns compiled at import
+        return extract_contact_info(text, stage)
 
     def _identify_sections(self, text: str) -> Dict[str, str]:
-        # Initialise the sections variable to store the sections
-        sections = {}
+        # Section name -> section content (the non-empty lines under the section heading)
+        return self._sections_from_spans(text, self._identify_section_spans(text))
 
-        # Split the text into individual lines
-        lines = text.split('\n')
+    def _identify_section_spans(self, text: str, stage=unlimited) -> Dict[str, List[Tuple[int, int]]]:
+        # Initialise the sections variable to store the (start, end) character offsets of each section's lines
+        sections = {}
 
         # Two variables to track the current section and content whilst parsing the text
         current_section = None
         current_content = []
 
+        # Track where each line starts in the original text so offsets line up with the spaCy doc
+        line_start = 0
+
         # Loop through the lines and identify the sections
-        for line in lines:
+        for raw_line in text.split('\n'):
+            # Out of time, keep the sections found so far
+            if stage.expired():
+                break
+
+            line_offset = line_start
+            line_start += len(raw_line) + 1
+
             # Remove leading and trailing whitespace
-            line = line.strip()
+            line = raw_line.strip()
 
             # Skip empty lines
             if not line:
                 continue
-            
-            # Variable to track if a regex pattern has been matched and therefore a new section has been found
-            section_found = None
-
-            # Iterate through the section_patterns dictionary and extract the section information using regex (if found)
-            for section_name, pattern in section_patterns.items():
-                if re.search(pattern, line) and len(line) < 50:
-                    section_found = section_name
-                    break
+
+            start = line_offset + len(raw_line) - len(raw_line.lstrip())
+            end = start + len(line)
+
+            # Section name if this line is a heading (one match against every section pattern), otherwise None
+            section_found = classify_line(line)
 
             # If a section has been found, save the current section and reset the current content
             if section_found:
                 if current_section and current_content:
-                    sections[current_section] = '\n'.join(current_content)
+                    sections[current_section] = current_content
                     
                 current_content = []
                 current_section = section_found
             else:
                 # If no section has been found, add the line to the current content
                 if current_section:
-                    current_content.append(line)
+                    current_content.append((start, end))
 
         # Save final section
         if current_section and current_content:
-            sections[current_section] = '\n'.join(current_content)
+            sections[current_section] = current_content
 
-        # Return the sections
+        # Return the section spans
         return sections
 
-    def _extract_skills_comprehensive(self, text: str) -> Dict[str, List[str]]:
-        # Make sure the text is all lowercase before searching for key skills
-        lower_text = text.lower()
-
-        # Initialise the skills variable to store the skills
-        skills = {
-            'programming_languages': [],
-            'frameworks_libraries': [],
-            'databases': [],
-            'cloud_tools': [],
-            'other_skills': []      
+    def _sections_from_spans(self, text: str, section_spans: Dict[str, List[Tuple[int, int]]]) -> Dict[str, str]:
+        # Join each section's lines back together
+        return {
+            section: '\n'.join(text[start:end] for start, end in line_spans)
+            for section, line_spans in section_spans.items()
         }
 
-        # Extract skills using _find_skills_in_text function
-        skills['programming_languages'] = self._find_skills_in_text(lower_text, programming_languages)
-        skills['frameworks_libraries'] = self._find_skills_in_text(lower_text, frameworks_libraries)
-        skills['databases'] = self._find_skills_in_text(lower_text, databases)
-        skills['cloud_tools'] = self._find_skills_in_text(lower_text, cloud_tools)
+    def _extract_skills_comprehensive(self, text: str, stage=unlimited) -> Dict[str, List[str]]:
+        # Single pass over the CV with the shared skill automaton, instead of one substring search per skill
+        skills = skill_matcher.find_by_category(text, stage)
+
+        # Keep the other_skills key the results have always had
+        skills['other_skills'] = []
 
         # Return the skills
         return skills
-    
-    def _find_skills_in_text(self, text: str, skill_set: set) -> List[str]:
-        # Initialise the found skills variable to store the skills
-        found_skills = []
-
-        for skill in skill_set:
-            # Handle edge cases of skills for example "Nodejs" vs "Node.js"
-            skill_varitations = [skill, skill.replace(".", ""), skill.replace(" ", "")]
-
-            # Loop through the skill_varitations and check if the skill is in the text
-            for variation in skill_varitations:
-                if variation in text:
-                    # Ensure the skill is the whole word and not found in a word
-                    # E.g. "C" should not be found in "Cafe Manager"
-                    if len(skill) <= 2:
-                        pattern = r'\b' + re.escape(skill.upper()) + r'\b'
-                        if re.search(pattern, text.upper()):
-                            found_skills.append(skill.upper())
-                            break
-                    else:
-                        # If not a shorter skill like C# or C then assume a match and append found_skills array
-                        found_skills.append(skill.title())
-                        break
-
-        # Return the found skills
-        return found_skills
-
-    def _extract_entities_with_context(self, full_doc, sections: Dict[str, str]) -> Dict[str, List[str]]:
+
+    def _extract_entities_with_context(self, context: AnalysisContext, sections: Dict[str, str], stage=unlimited) -> Dict[str, List[str]]:
+        full_doc, section_spans, technical_skills = context.doc, context.section_spans, context.technical_skills
+
         entities = {
             'names': [],
             'organisations': [],
@@ -194,16 +225,18 @@ class CVAnalyser:
         }
 
         # Focusing on organisations from experience section (most likely previous or current employers)
+        # Entities come from the full doc, filtered to the section's character range rather than re-parsing it
         experience_text = sections.get('experience', '')
 
         if experience_text:
-            exp_doc = self.nlp(experience_text)
+            for ent in self._entities_in_section(full_doc, section_spans['experience']):
+                if stage.expired():
+                    break
 
-            for ent in exp_doc.ents:
                 if ent.label_ == 'ORG':
                     entity_text = ent.text.strip()
 
-                    if self._is_valid_employer(entity_text, experience_text):
+                    if self._is_valid_employer(entity_text, experience_text, technical_skills):
                         entities['organisations'].append(entity_text)
 
         
@@ -211,21 +244,25 @@ class CVAnalyser:
         education_text = sections.get('education', '')
 
         if education_text:
-            edu_doc = self.nlp(education_text)
+            for ent in self._entities_in_section(full_doc, section_spans['education']):
+                if stage.expired():
+                    break
 
-            for ent in edu_doc.ents:
                 if ent.label_ == 'ORG':
                     entity_text = ent.text.strip()
 
-                    if self._is_valid_school(entity_text, education_text):
+                    if self._is_valid_school(entity_text, education_text, technical_skills):
                         entities['organisations'].append(entity_text)
 
         for ent in full_doc.ents:
+            if stage.expired():
+                break
+
             if ent.label_ in ['GPE', 'LOC', 'DATE']:
                 entity_text = ent.text.strip()
 
                 if ent.label_ in ['GPE', 'LOC']:
-                    if entity_text.lower() not in self.all_technical_skills:
+                    if entity_text.lower() not in technical_skills:
                         if len(entity_text) > 2 and not entity_text.endswith('.js'):
                             entities['locations'].append(entity_text)
                 else:
@@ -237,7 +274,16 @@ class CVAnalyser:
 
         return entities
 
-    def _is_valid_employer(self, org_name: str, experience_context: str) -> bool:
+    def _entities_in_section(self, doc, line_spans: List[Tuple[int, int]]):
+        # Entities of the full doc that fall inside the section (from its first line to its last)
+        section_start, section_end = line_spans[0][0], line_spans[-1][1]
+
+        return [
+            ent for ent in doc.ents
+            if ent.start_char >= section_start and ent.end_char <= section_end
+        ]
+
+    def _is_valid_employer(self, org_name: str, experience_context: str, technical_skills=frozenset()) -> bool:
         
         org_lower = org_name.lower()
         context_lower = experience_context.lower()
@@ -250,7 +296,7 @@ class CVAnalyser:
             return False
         
         # Reject if it's actually a skill or technology
-        if org_lower in self.all_technical_skills:
+        if org_lower in technical_skills:
             return False
         
         # Reject common section headers or formatting artifacts
@@ -284,7 +330,7 @@ class CVAnalyser:
 
         return True
 
-    def _is_valid_school(self, org_name: str, education_context: str):
+    def _is_valid_school(self, org_name: str, education_context: str, technical_skills=frozenset()):
 
         org_lower = org_name.lower()
         context_lower = education_context.lower()
@@ -292,7 +338,7 @@ class CVAnalyser:
         if org_name.startswith('•') or len(org_name) < 3:
             return False
         
-        if org_lower in self.all_technical_skills:
+        if org_lower in technical_skills:
             return False
 
         education_keywords = [
@@ -318,37 +364,13 @@ class CVAnalyser:
 
         return False
 
-    def _extract_experience_indicators(self, text: str) -> List[str]:
-        # Extract phrases that indicate work experience
-        # Variable to store extracted experience indicators
-        indicators = []
-        
-        # Loop through the experience_patterns and extract the experience indicators using regex
-        for pattern in experience_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            indicators.extend(matches)
-
-        words = text.split(" ")
-
-        for w in words:
-            if w in experience_indicators:
-                indicators.append(w)
-        
-        # Return the experience indicators
-        return indicators
+    def _extract_experience_indicators(self, text: str, stage=unlimited) -> List[str]:
+        # Extract phrases that indicate work experience, all experience patterns in a single scan
+        return extract_experience_indicators(text, stage)
 
-    def _extract_education_info(self, text: str) -> List[str]:
-        # Extract education information
-        # Variable to store extracted education information
-        education_info = []
-        
-        # Loop through the education_patterns and extract the education information using regex
-        for pattern in education_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            education_info.extend(matches)
-        
-        # Return the education information
-        return education_info
+    def _extract_education_info(self, text: str, stage=unlimited) -> List[str]:
+        # Extract education information, all education patterns in a single scan
+        return extract_education_info(text, stage)
 
 # Exporting the class rather than a function to utalise a singleton pattern in main.py
 __all__ = ['CVAnalyser']  
@@ -1,30 +1,209 @@
-import pdfplumber
-from .exceptions import PDFPassingError, InsufficientDataError
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, List, Optional, Union
+from .config import (
+    pdf_max_pages, pdf_extraction_budget_seconds,
+    pdf_parallel_extraction, pdf_parallel_min_pages, pdf_extraction_workers
+)
+from .exceptions import CVAnalysisError, PDFPassingError, InsufficientDataError
+from .pdf_extractors import get_pdf_extractor
+
+# Persistent pool for extracting pages in parallel, created on first use
+_page_pool = None
+_page_pool_lock = threading.Lock()
+# Extractions using each pool, the current one or a retired one that still has extractions running
+_page_pool_users = {}
+
+# Off in analysis worker processes, which are handed extracted text (see analysis_pool.extract_pdf_text)
+# and so never start a page pool of their own
+_page_parallelism = True
+
+
+def disable_page_parallelism():
+    """Extract every page in this process from now on, called as each analysis worker process starts"""
+    global _page_parallelism
+    _page_parallelism = False
+
 
 # Extracting the text out of the pdf to analyse later in the pipeline
-def extract_cv_text(pdf_path: str):
+# Accepts a file path, the PDF's bytes (e.g. an upload already in memory) or a binary file-like object,
+# and the name of the extractor backend to use (pdf_extractor_backend from config by default).
+# offload hands even PDFs too short to split to the page pool (as one task), keeping the work out of this process
+def extract_cv_text(pdf_source: Union[str, os.PathLike, bytes, BinaryIO], parallel: Optional[bool] = None,
+                    backend: Optional[str] = None, offload: bool = False):
+    # Name used in error messages, uploads have no path
+    pdf_path = pdf_source if isinstance(pdf_source, (str, os.PathLike)) else "uploaded PDF"
+    parallel = pdf_parallel_extraction if parallel is None else parallel
+    extractor = get_pdf_extractor(backend)
+
+    # Streams are read once so the same bytes can be opened here and, for parallel extraction, in every worker
+    if not isinstance(pdf_source, (str, os.PathLike, bytes, bytearray, memoryview)):
+        pdf_source = pdf_source.read()
+    if isinstance(pdf_source, (bytearray, memoryview)):
+        pdf_source = bytes(pdf_source)
+
+    deadline = time.perf_counter() + pdf_extraction_budget_seconds
+
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        # Raw bytes are opened from memory so they never touch the disk
+        with extractor.open(pdf_source) as document:
             # Check if the PDF is empty
-            if not pdf.pages:
+            page_count = document.page_count
+            if not page_count:
                 raise PDFPassingError(f"CV appears to be empty: {pdf_path}")
 
-            text = ""
-
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                # Check if the page is empty
-                if not page_text:
-                    raise PDFPassingError(f"No text found on page: {pdf_path}")
-                
-                text += (page_text + "\n")
-
-            # Check if the CV contains enough data
-            if len(text) < 100:
-                raise InsufficientDataError(f"CV doesnt contain enough data: {pdf_path}")
-            
-            return text
+            # Fail fast on portfolios and other huge documents, before extracting anything
+            if page_count > pdf_max_pages:
+                raise PDFPassingError(f"CV has {page_count} pages, the maximum is {pdf_max_pages}: {pdf_path}")
+
+            split = pdf_extraction_workers > 1 and page_count >= pdf_parallel_min_pages
+            if parallel and _page_parallelism and (split or offload):
+                workers = min(pdf_extraction_workers, page_count) if split else 1
+                page_texts = _extract_pages_parallel(pdf_source, extractor.name, page_count, workers, deadline, pdf_path)
+            else:
+                page_texts = _extract_pages_sequential(document, page_count, deadline, pdf_path)
+
+        # Check if any page is empty
+        if not all(page_texts):
+            raise PDFPassingError(f"No text found on page: {pdf_path}")
+
+        # Joined once rather than growing a string page by page
+        text = "\n".join(page_texts) + "\n"
+
+        # Check if the CV contains enough data
+        if len(text) < 100:
+            raise InsufficientDataError(f"CV doesnt contain enough data: {pdf_path}")
+
+        return text
+    except CVAnalysisError:
+        raise
     except FileNotFoundError:
         raise PDFPassingError(f"CV File not found: {pdf_path}")
     except Exception as e:
         raise PDFPassingError(f"Error extracting text from PDF: {e}")
+
+
+def _extract_pages_sequential(document, page_count: int, deadline: float, pdf_path) -> List[str]:
+    """
+    Extract the pages one after another in this process. A page can't be interrupted once started, so the
+    next page isn't started when it would run past the deadline if it took as long as the slowest page so far.
+    """
+    page_texts = []
+    slowest_page = 0.0
+
+    for page_number in range(page_count):
+        started = time.perf_counter()
+        if started + slowest_page > deadline:
+            raise PDFPassingError(f"PDF text extraction took longer than {pdf_extraction_budget_seconds}s: {pdf_path}")
+
+        page_texts.append(document.extract_page(page_number))
+        slowest_page = max(slowest_page, time.perf_counter() - started)
+
+    if time.perf_counter() > deadline:
+        raise PDFPassingError(f"PDF text extraction took longer than {pdf_extraction_budget_seconds}s: {pdf_path}")
+
+    return page_texts
+
+
+def _extract_pages_parallel(pdf_source, backend: str, page_count: int, workers: int, deadline: float, pdf_path) -> List[str]:
+    """
+    Deal the pages out to that many workers (every n-th page, so text-heavy stretches are spread out),
+    each worker opens the PDF itself (parsed pages can't be pickled) and returns its pages' text.
+    A pool broken under us (e.g. a worker killed by the OS) is replaced and the pages tried once more.
+    """
+    ranges = [list(range(first_page, page_count, workers)) for first_page in range(workers)]
+
+    for attempt in range(2):
+        pool = _acquire_page_pool()
+        retire = False
+
+        try:
+            futures = [pool.submit(_extract_page_range, pdf_source, backend, page_numbers) for page_numbers in ranges]
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.perf_counter()), return_when=FIRST_EXCEPTION)
+
+            # Only this PDF's pages still queued are dropped, other extractions share the pool
+            for future in not_done:
+                future.cancel()
+
+            # Stopped by a failing page rather than the clock
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+
+            if not_done:
+                # A page can't be stopped once started, so the pool is retired with the worker still busy on it
+                retire = True
+                raise PDFPassingError(f"PDF text extraction took longer than {pdf_extraction_budget_seconds}s: {pdf_path}")
+        except BrokenProcessPool:
+            retire = True
+            if attempt or time.perf_counter() >= deadline:
+                # Nothing wrong with the PDF, so not a PDFPassingError (a 400)
+                raise CVAnalysisError(f"PDF extraction workers stopped unexpectedly: {pdf_path}")
+            continue
+        finally:
+            _release_page_pool(pool, retire)
+
+        page_texts = [None] * page_count
+        for page_numbers, future in zip(ranges, futures):
+            for page_number, page_text in zip(page_numbers, future.result()):
+                page_texts[page_number] = page_text
+
+        return page_texts
+
+
+def _extract_page_range(pdf_source, backend: str, page_numbers: List[int]) -> List[str]:
+    """Runs in a worker process, extracts the text of the given pages with the named backend"""
+    with get_pdf_extractor(backend).open(pdf_source) as document:
+        return [document.extract_page(page_number) for page_number in page_numbers]
+
+
+def _acquire_page_pool():
+    """The current page pool, counted as in use until _release_page_pool()"""
+    global _page_pool
+
+    with _page_pool_lock:
+        if _page_pool is None:
+            # spawn rather than fork, forking a process that is already running threads (uvicorn) isn't safe
+            _page_pool = ProcessPoolExecutor(
+                max_workers=pdf_extraction_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        _page_pool_users[_page_pool] = _page_pool_users.get(_page_pool, 0) + 1
+        return _page_pool
+
+
+def _release_page_pool(pool, retire: bool = False):
+    """
+    Done with the pool. A retired pool (left running a page past its budget, or broken) is swapped for a fresh
+    one straight away, but its worker processes are only terminated once no other extraction is still using it.
+    """
+    global _page_pool
+
+    with _page_pool_lock:
+        _page_pool_users[pool] -= 1
+        if retire and _page_pool is pool:
+            _page_pool = None
+
+        if _page_pool is pool or _page_pool_users[pool]:
+            return
+        del _page_pool_users[pool]
+
+    # ProcessPoolExecutor has no public way to stop a running task, so its worker processes are terminated
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def shutdown_page_pool():
+    """Stop the page extraction processes, e.g. when the API shuts down"""
+    global _page_pool
+
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=True, cancel_futures=True)
+            _page_pool = None
@@ -0,0 +1,503 @@
+import hashlib
+import threading
+from functools import cached_property
+from types import MappingProxyType
+
+import numpy as np
+
+from .tfidf import TFIDFFromScratch
+from .sparse_matrix import CSRMatrix
+from .exceptions import InsufficientDataError
+
+
+class JobCorpusIndex:
+    """
+    TF-IDF model fitted over a job corpus, holding the job term frequencies, IDF values and
+    precomputed job norms. Nothing is changed after construction, so one instance can be shared
+    by concurrent /api/match-job requests, each of which only has to transform its CV profile.
+
+    Scores are the same as fitting the CV and jobs together like calculate_similarity_results does.
+    idf is smoothed (calculated as if the CV were one extra document containing the word), which is
+    exact for the words the CV does contain. Job words the CV doesn't contain keep the IDF they'd get
+    without it, so the job norms depend on the CV and are corrected for its words when it's scored.
+    """
+
+    def __init__(self, vocabulary, idf, tf_matrix, job_ids, job_descriptions=None, fingerprint=None):
+        idf = np.array(idf, dtype=np.float64)
+        idf.setflags(write=False)
+
+        # IDF of a job word the CV doesn't contain, log((jobs + 1) / document frequency), as when the
+        # CV is fitted together with the jobs (columns no job uses any more are never looked up)
+        n_jobs = tf_matrix.shape[0]
+        document_frequency = np.bincount(tf_matrix.indices, minlength=len(idf))
+        idf_without_cv = np.zeros(len(idf))
+        np.divide(n_jobs + 1, document_frequency, out=idf_without_cv, where=document_frequency > 0)
+        np.log(idf_without_cv, out=idf_without_cv, where=document_frequency > 0)
+
+        # Squared norms of the TF-IDF job vectors for a CV sharing none of their words,
+        # and what each word the CV does contain changes them by per unit of TF squared
+        job_squared_norms = tf_matrix.scale_columns(idf_without_cv).row_norms() ** 2
+        norm_corrections = idf ** 2 - idf_without_cv ** 2
+        for array in (job_squared_norms, norm_corrections):
+            array.setflags(write=False)
+
+        object.__setattr__(self, 'vocabulary', tuple(vocabulary))
+        object.__setattr__(self, 'vocabulary_index', MappingProxyType({word: i for i, word in enumerate(vocabulary)}))
+        object.__setattr__(self, 'idf', idf)
+        object.__setattr__(self, 'tf_matrix', tf_matrix.freeze())
+        object.__setattr__(self, 'job_squared_norms', job_squared_norms)
+        object.__setattr__(self, 'norm_corrections', norm_corrections)
+        object.__setattr__(self, 'job_ids', tuple(job_ids))
+        object.__setattr__(self, 'job_descriptions', tuple(job_descriptions) if job_descriptions is not None else None)
+        object.__setattr__(self, 'fingerprint', fingerprint)
+        object.__setattr__(self, 'unseen_word_idf', np.log(len(job_ids) + 1))
+        # CV profiles are different on nearly every request, so keep them out of the job cache
+        object.__setattr__(self, '_tokenizer', TFIDFFromScratch(cache=None))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("JobCorpusIndex is immutable, fit a new index instead")
+
+    @classmethod
+    def fit(cls, job_descriptions, job_ids=None, fingerprint=None):
+        """
+        Fit TF-IDF over the job descriptions and precompute their vectors.
+        Job ids default to 1-based positions, matching job_index in calculate_similarity_results.
+        """
+        tfidf = TFIDFFromScratch(smooth_idf=True)
+        tfidf.fit(job_descriptions)
+
+        idf = [tfidf.idf_values[word] for word in tfidf.vocabulary]
+
+        tf_rows = []
+        for doc in tfidf.documents:
+            tf_dict = tfidf.calculate_tf(doc) if doc else {}
+            tf_rows.append({tfidf.vocabulary_index[word]: tf for word, tf in tf_dict.items()})
+
+        tf_matrix = CSRMatrix.from_rows(tf_rows, len(tfidf.vocabulary))
+
+        if job_ids is None:
+            job_ids = range(1, len(job_descriptions) + 1)
+
+        return cls(
+            tfidf.vocabulary, idf, tf_matrix, job_ids, job_descriptions,
+            fingerprint or corpus_fingerprint(job_descriptions)
+        )
+
+    @property
+    def idf_values(self):
+        return MappingProxyType(dict(zip(self.vocabulary, self.idf)))
+
+    def __len__(self):
+        return self.tf_matrix.shape[0]
+
+    def transform_cv(self, cv_text):
+        """
+        Dense TF-IDF vector for a CV profile using the job corpus vocabulary and IDF values
+        """
+        cv_vector, _ = self._transform_cv_with_norm(cv_text)
+        return cv_vector
+
+    def score(self, cv_text):
+        """
+        Cosine similarity between a CV profile and every job in the index, in job order
+        """
+        cv_row, cv_norm = self._cv_row_with_norm(cv_text)
+        cv_vector = self._dense_cv_vector(cv_row, cv_norm)
+
+        # cv . job = sum(cv_tfidf * job_tf * idf), so fold the IDF into the CV side once
+        dot_products = self.tf_matrix.dot(cv_vector * self.idf)
+        denominators = self.job_norms_for([cv_row])[0] * cv_norm
+
+        # Jobs (or a CV) with zero magnitude get a similarity of 0
+        similarities = np.zeros(len(self))
+        np.divide(dot_products, denominators, out=similarities, where=denominators > 0)
+
+        return similarities
+
+    def score_many(self, cv_texts):
+        """
+        Cosine similarity of several CV profiles against every job using one sparse matrix-matrix
+        product. Returns a (CVs x jobs) array and the CV magnitudes, a CV with a magnitude of 0
+        had no relevant information and scores 0 against everything.
+        """
+        cv_rows = []
+        cv_norms = np.zeros(len(cv_texts))
+
+        for i, cv_text in enumerate(cv_texts):
+            cv_row, cv_norms[i] = self._cv_row_with_norm(cv_text)
+            cv_rows.append(cv_row)
+
+        # Fold the IDF into the CV side once, like score() does
+        cv_matrix = CSRMatrix.from_rows(
+            [{column: value * self.idf[column] for column, value in cv_row.items()} for cv_row in cv_rows],
+            len(self.vocabulary)
+        )
+        dot_products = cv_matrix.matmul_transpose(self.tf_matrix_transposed)
+        denominators = cv_norms[:, np.newaxis] * self.job_norms_for(cv_rows)
+
+        similarities = np.zeros(dot_products.shape)
+        np.divide(dot_products, denominators, out=similarities, where=denominators > 0)
+
+        return similarities, cv_norms
+
+    def job_norms_for(self, cv_rows):
+        """
+        (CVs x jobs) norms of the job TF-IDF vectors as fitted together with each CV: the CV's words
+        take the smoothed IDF and every other word the IDF without the CV. Only the CV's columns are
+        visited, so the cost is the number of job entries in those columns.
+        """
+        corrections = CSRMatrix.from_rows(
+            [{column: self.norm_corrections[column] for column in cv_row} for cv_row in cv_rows],
+            len(self.vocabulary)
+        ).matmul_transpose(self.tf_squared_transposed)
+
+        # Never below 0, rounding can leave -1e-17 where every word of a job is corrected
+        return np.sqrt(np.maximum(self.job_squared_norms + corrections, 0))
+
+    @cached_property
+    def tf_matrix_transposed(self):
+        """Word x job view of the TF matrix, only built the first time a CV is scored"""
+        return self.tf_matrix.transpose().freeze()
+
+    @cached_property
+    def tf_squared_transposed(self):
+        """Word x job view of the squared TF values, for the CV-dependent job norms"""
+        transposed = self.tf_matrix_transposed
+        return CSRMatrix(transposed.indptr, transposed.indices, transposed.data ** 2, transposed.shape).freeze()
+
+    @cached_property
+    def job_positions(self):
+        """Job id -> row lookup, only built the first time jobs are picked out by id"""
+        return MappingProxyType({job_id: position for position, job_id in enumerate(self.job_ids)})
+
+    def positions_of(self, job_ids):
+        """Rows of the given jobs (in the given order) and the ids that aren't in the index"""
+        positions = []
+        missing = []
+        for job_id in job_ids:
+            position = self.job_positions.get(job_id)
+            if position is None:
+                missing.append(job_id)
+            else:
+                positions.append(position)
+
+        return np.array(positions, dtype=np.int64), missing
+
+    def subset(self, positions):
+        """
+        Index over just the given rows (in the given order), with IDF calculated from those jobs alone,
+        so scoring a selection of jobs is the same as fitting the CV together with only those jobs.
+        Columns of words no selected job uses stay, they count as words no job contains.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        tf_matrix = self.tf_matrix.select_rows(positions)
+
+        document_frequency = np.bincount(tf_matrix.indices, minlength=len(self.vocabulary))
+        idf = np.log((len(positions) + 1) / (document_frequency + 1))
+
+        job_ids = np.empty(len(self.job_ids), dtype=object)
+        job_ids[:] = self.job_ids
+        job_descriptions = None
+        if self.job_descriptions is not None:
+            job_descriptions = [self.job_descriptions[position] for position in positions]
+
+        return JobCorpusIndex(self.vocabulary, idf, tf_matrix, job_ids[positions], job_descriptions)
+
+    def _transform_cv_with_norm(self, cv_text):
+        """Dense CV vector and magnitude, raising if the CV has no relevant information"""
+        cv_row, cv_norm = self._cv_row_with_norm(cv_text)
+        return self._dense_cv_vector(cv_row, cv_norm), cv_norm
+
+    def _dense_cv_vector(self, cv_row, cv_norm):
+        if cv_norm == 0:
+            raise InsufficientDataError("CV profile does not contain relevant information for analysis")
+
+        cv_vector = np.zeros(len(self.vocabulary))
+        for column, value in cv_row.items():
+            cv_vector[column] = value
+
+        return cv_vector
+
+    def _cv_row_with_norm(self, cv_text):
+        """
+        Build the CV's {column: TF-IDF} row and its magnitude. Words no job contains have no column
+        in the matrix, but they still count towards the CV magnitude (with the unseen word IDF)
+        just like they did when the CV was fitted together with the jobs.
+        """
+        cv_document = self._tokenizer.preprocess_text(cv_text)
+
+        if not cv_document:
+            return {}, 0.0
+
+        cv_row = {}
+        squared_sum = 0.0
+
+        for word, tf in self._tokenizer.calculate_tf(cv_document).items():
+            column = self.vocabulary_index.get(word)
+            if column is None:
+                squared_sum += (tf * self.unseen_word_idf) ** 2
+            else:
+                cv_row[column] = tf * self.idf[column]
+                squared_sum += cv_row[column] ** 2
+
+        return cv_row, np.sqrt(squared_sum)
+
+
+class IncrementalJobIndex:
+    """
+    Job index that can add, update and remove individual jobs by id without a full refit.
+
+    Document frequencies are kept up to date on every change, while IDF values and job norms
+    are only recomputed when a snapshot is requested. Removed jobs are tombstoned and physically
+    dropped (along with words no job uses any more) once they pass compaction_ratio of the rows.
+    Snapshots are immutable JobCorpusIndex objects, so readers never see a half applied change.
+    """
+
+    def __init__(self, compaction_ratio=0.25):
+        self.compaction_ratio = compaction_ratio
+
+        self._tokenizer = TFIDFFromScratch()
+        self._lock = threading.RLock()
+
+        # Vocabulary only ever grows between compactions, columns are never reused
+        self._vocabulary = []
+        self._vocabulary_index = {}
+        self._document_frequency = []
+
+        # Rows that have been merged into the matrix, plus rows added since the last snapshot
+        self._matrix = CSRMatrix.from_rows([], 0)
+        self._pending_rows = []
+
+        # Per row (merged + pending) job id and description, and job id -> row lookup
+        self._row_ids = []
+        self._row_descriptions = []
+        self._job_rows = {}
+        self._tombstones = set()
+
+        self._snapshot = None
+
+    def __len__(self):
+        return len(self._job_rows)
+
+    def __contains__(self, job_id):
+        return job_id in self._job_rows
+
+    def add_jobs(self, jobs):
+        """
+        Add jobs given as (job_id, description) pairs. A job id that is already indexed
+        is treated as an update, its old row is tombstoned and replaced.
+        """
+        jobs = list(jobs)
+
+        # Tokenise the whole batch up front (in parallel for large batches) before taking the lock
+        documents = self._tokenizer.preprocess_documents(description for _, description in jobs)
+
+        self.add_documents(
+            (job_id, document, description) for (job_id, description), document in zip(jobs, documents)
+        )
+
+    def add_documents(self, documents):
+        """
+        Add jobs that are already preprocessed, given as (job_id, {term: weighted count}, description)
+        triples, e.g. loaded from the job store, so nothing is tokenised. description may be None.
+        """
+        with self._lock:
+            for job_id, document, description in documents:
+                if job_id in self._job_rows:
+                    self._remove(job_id)
+
+                tf_dict = self._tokenizer.calculate_tf(document) if document else {}
+
+                row = {}
+                for word, tf in tf_dict.items():
+                    column = self._vocabulary_index.get(word)
+                    if column is None:
+                        column = len(self._vocabulary)
+                        self._vocabulary.append(word)
+                        self._vocabulary_index[word] = column
+                        self._document_frequency.append(0)
+
+                    self._document_frequency[column] += 1
+                    row[column] = tf
+
+                self._job_rows[job_id] = len(self._row_ids)
+                self._row_ids.append(job_id)
+                self._row_descriptions.append(description)
+                self._pending_rows.append(row)
+
+            self._snapshot = None
+
+    def add_job(self, job_id, description):
+        """Add (or update) a single job"""
+        self.add_jobs([(job_id, description)])
+
+    update_job = add_job
+
+    def remove_jobs(self, job_ids):
+        """Tombstone jobs by id, unknown ids are ignored"""
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._job_rows:
+                    self._remove(job_id)
+
+            self._snapshot = None
+
+    def remove_job(self, job_id):
+        """Tombstone a single job"""
+        self.remove_jobs([job_id])
+
+    def snapshot(self):
+        """
+        Immutable JobCorpusIndex of the live jobs. Built lazily and reused until the next change.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._merge_pending()
+
+                if len(self._tombstones) > self.compaction_ratio * len(self._row_ids):
+                    self.compact()
+
+                self._snapshot = self._build_snapshot()
+
+            return self._snapshot
+
+    def compact(self):
+        """
+        Physically drop tombstoned rows and words no live job uses, renumbering rows and columns
+        """
+        with self._lock:
+            self._merge_pending()
+
+            live_rows = self._live_rows()
+            matrix = self._matrix.select_rows(live_rows)
+
+            # Map old columns onto the columns that still have at least one document
+            document_frequency = np.array(self._document_frequency, dtype=np.int64)
+            kept_columns = np.flatnonzero(document_frequency > 0)
+            column_mapping = np.full(len(document_frequency), -1, dtype=np.int64)
+            column_mapping[kept_columns] = np.arange(len(kept_columns))
+
+            self._matrix = CSRMatrix(
+                matrix.indptr, column_mapping[matrix.indices], matrix.data, (matrix.shape[0], len(kept_columns))
+            )
+
+            self._vocabulary = [self._vocabulary[column] for column in kept_columns]
+            self._vocabulary_index = {word: i for i, word in enumerate(self._vocabulary)}
+            self._document_frequency = document_frequency[kept_columns].tolist()
+
+            self._row_ids = [self._row_ids[row] for row in live_rows]
+            self._row_descriptions = [self._row_descriptions[row] for row in live_rows]
+            self._job_rows = {job_id: row for row, job_id in enumerate(self._row_ids)}
+            self._tombstones = set()
+
+            self._snapshot = None
+
+    def _remove(self, job_id):
+        """Tombstone the job's row and take its words out of the document frequencies"""
+        row = self._job_rows.pop(job_id)
+
+        merged_rows = self._matrix.shape[0]
+        if row < merged_rows:
+            columns = self._matrix.indices[self._matrix.indptr[row]:self._matrix.indptr[row + 1]]
+        else:
+            columns = self._pending_rows[row - merged_rows].keys()
+
+        for column in columns:
+            self._document_frequency[column] -= 1
+
+        self._row_descriptions[row] = None
+        self._tombstones.add(row)
+
+    def _merge_pending(self):
+        """Append the rows added since the last snapshot to the matrix"""
+        n_cols = len(self._vocabulary)
+
+        if self._pending_rows:
+            pending = CSRMatrix.from_rows(self._pending_rows, n_cols)
+            self._matrix = CSRMatrix.vstack([self._matrix, pending], n_cols)
+            self._pending_rows = []
+        elif self._matrix.shape[1] != n_cols:
+            self._matrix = CSRMatrix.vstack([self._matrix], n_cols)
+
+    def _live_rows(self):
+        """Indexes of rows that have not been tombstoned"""
+        alive = np.ones(len(self._row_ids), dtype=bool)
+        alive[list(self._tombstones)] = False
+        return np.flatnonzero(alive)
+
+    def _build_snapshot(self):
+        """JobCorpusIndex over the live rows with freshly calculated (smoothed) IDF values"""
+        live_rows = self._live_rows()
+        total_docs = len(live_rows)
+
+        document_frequency = np.array(self._document_frequency, dtype=np.float64)
+        idf = np.log((total_docs + 1) / (document_frequency + 1))
+
+        # Object arrays so the live rows can be picked out without a Python loop
+        row_ids = np.empty(len(self._row_ids), dtype=object)
+        row_ids[:] = self._row_ids
+        row_descriptions = np.empty(len(self._row_descriptions), dtype=object)
+        row_descriptions[:] = self._row_descriptions
+
+        return JobCorpusIndex(
+            self._vocabulary, idf, self._matrix.select_rows(live_rows),
+            row_ids[live_rows], row_descriptions[live_rows]
+        )
+
+
+def corpus_fingerprint(job_descriptions):
+    """Stable hash of an ordered list of job descriptions, used to tell if the corpus changed"""
+    digest = hashlib.sha256()
+    for description in job_descriptions:
+        digest.update(description.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+# Fitted index for the most recent job corpus, shared across requests in this process
+_index_lock = threading.Lock()
+_current_index = None
+
+# Most recent selection of jobs out of a job store snapshot, as (snapshot, job ids, subset index, missing ids)
+_subset_lock = threading.Lock()
+_current_subset = None
+
+
+def get_job_index(job_descriptions):
+    """
+    Return the fitted index for this job corpus, only fitting when the corpus has changed.
+    Fitting happens under a lock so concurrent requests with a new corpus fit it once.
+    """
+    global _current_index
+
+    fingerprint = corpus_fingerprint(job_descriptions)
+
+    index = _current_index
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+
+    with _index_lock:
+        if _current_index is None or _current_index.fingerprint != fingerprint:
+            _current_index = JobCorpusIndex.fit(job_descriptions, fingerprint=fingerprint)
+        return _current_index
+
+
+def get_job_subset(job_index, job_ids):
+    """
+    Index over the requested jobs of job_index with their own IDF (see JobCorpusIndex.subset), and the
+    requested ids it doesn't have. Clients tend to match against the same job list repeatedly, so the
+    most recent selection is kept until the ids or the snapshot change.
+    """
+    global _current_subset
+
+    # A job listed twice would count twice in the document frequencies
+    job_ids = tuple(dict.fromkeys(job_ids))
+
+    with _subset_lock:
+        cached = _current_subset
+        if cached is None or cached[0] is not job_index or cached[1] != job_ids:
+            positions, missing = job_index.positions_of(job_ids)
+            cached = (job_index, job_ids, job_index.subset(positions), missing)
+            _current_subset = cached
+
+        return cached[2], list(cached[3])
@@ -0,0 +1,148 @@
+import json
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from .config import job_ingest_batch_size
+from .job_store import JobStore, hash_job
+
+
+def parse_job_line(line: Union[str, bytes]) -> Optional[Tuple[object, Optional[str], str]]:
+    """
+    One NDJSON job record, {"id": ..., "title": ..., "description": ...}, as (job_id, title, description).
+    Blank lines give None, malformed records raise ValueError.
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("record is not a JSON object")
+
+    job_id = record.get("id")
+    # bool is an int subclass, but True isn't a job id
+    if isinstance(job_id, bool) or not isinstance(job_id, (int, str)) or job_id == "":
+        raise ValueError("record has no usable 'id'")
+
+    description = record.get("description")
+    if not isinstance(description, str) or not description.strip():
+        raise ValueError("record has no 'description'")
+
+    title = record.get("title")
+    if title is not None and not isinstance(title, str):
+        raise ValueError("'title' is not a string")
+
+    return job_id, title, description
+
+
+class JobIngest:
+    """
+    Streams NDJSON job records into a JobStore. Raw lines (or chunks of the stream) are only queued as they
+    arrive, and each batch is split, parsed and validated in write_batch(), off the event loop. Records with a
+    new id whose content another id already has (earlier in this feed, or stored) are dropped as duplicates,
+    and the rest are handed to the store, where they're tokenised together and written job_store_batch_size at a time.
+    Feed add_line() or add_chunk() and call write_batch() whenever batch_ready(), then flush() at the end.
+    """
+
+    def __init__(self, store: JobStore, batch_size: Optional[int] = None, max_errors: int = 20):
+        self.store = store
+        self.batch_size = batch_size or job_ingest_batch_size
+        self.max_errors = max_errors
+
+        self.counts = {"received": 0, "invalid": 0, "duplicates": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+        self.errors: List[str] = []
+
+        self._line_number = 0
+        # Content hash -> id of the first record in this feed with that content
+        self._first_ids = {}
+        self._lines = []
+        # Raw stream chunks not parsed yet (the last line can continue in the next chunk) and their newlines
+        self._chunks = []
+        self._chunk_lines = 0
+        self._started = time.perf_counter()
+
+    def add_line(self, line: Union[str, bytes]):
+        """Queue one record, it's parsed with the rest of its batch"""
+        self._lines.append(line)
+
+    def add_chunk(self, chunk: bytes):
+        """Queue raw NDJSON bytes as they arrive, only the newlines are counted here"""
+        self._chunks.append(chunk)
+        self._chunk_lines += chunk.count(b"\n")
+
+    def batch_ready(self) -> bool:
+        return len(self._lines) + self._chunk_lines >= self.batch_size
+
+    def _parse_line(self, line: Union[str, bytes]):
+        self._line_number += 1
+
+        try:
+            job = parse_job_line(line)
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            self.counts["invalid"] += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append(f"line {self._line_number}: {e}")
+            return None
+
+        if job is not None:
+            self.counts["received"] += 1
+        return job
+
+    def write_batch(self, final: bool = False):
+        """
+        Parse, deduplicate and store the lines queued so far. Runs the tokenizer, so keep it off the event loop.
+        A partial last line from add_chunk() waits for the next batch unless this is the final one.
+        """
+        lines, self._lines = self._lines, []
+
+        if self._chunks:
+            *chunk_lines, pending = b"".join(self._chunks).split(b"\n")
+            lines.extend(chunk_lines)
+            if final:
+                lines.append(pending)
+
+            self._chunks = [pending] if pending and not final else []
+            self._chunk_lines = 0
+
+        batch = [job for job in map(self._parse_line, lines) if job is not None]
+        if not batch:
+            return
+
+        content_hashes = [hash_job(title, description) for _, title, description in batch]
+        stored_ids_by_hash = self.store.ids_by_content_hash(list(set(content_hashes)))
+        stored_ids = self.store.stored_job_ids([job_id for job_id, _, _ in batch])
+
+        unique = []
+        for job, content_hash in zip(batch, content_hashes):
+            job_id = job[0]
+
+            # Another id already has this content, stored or earlier in this feed
+            held_elsewhere = (self._first_ids.get(content_hash, job_id) != job_id
+                              or bool(stored_ids_by_hash.get(content_hash, set()) - {job_id}))
+
+            # Only a new id is dropped as a duplicate, a stored job is always updated (or counted as unchanged)
+            if held_elsewhere and job_id not in stored_ids:
+                self.counts["duplicates"] += 1
+                continue
+
+            self._first_ids.setdefault(content_hash, job_id)
+            unique.append(job)
+
+        for name, count in self.store.upsert_jobs(unique).items():
+            self.counts[name] += count
+
+    def flush(self):
+        """Write whatever is still queued, including a last line with no trailing newline"""
+        self.write_batch(final=True)
+
+    def report(self) -> Dict[str, object]:
+        """Counts so far, the first errors and the throughput in records received per second"""
+        seconds = time.perf_counter() - self._started
+        return {
+            **self.counts,
+            "errors": self.errors,
+            "total_jobs": len(self.store),
+            "seconds": round(seconds, 3),
+            "jobs_per_second": round(self.counts["received"] / seconds, 1) if seconds > 0 else 0.0
+        }
@@ -1,13 +1,18 @@
 # JobMatchResult class to store job match results (more pythonic)
 
 class JobMatchResult:
-    def __init__(self, job_index, similarity, description, match_quality):
+    def __init__(self, job_index, similarity, description, match_quality, job_id=None):
         self.job_index = job_index
+        # Id of the job in the index it was scored against (defaults to job_index)
+        self.job_id = job_index if job_id is None else job_id
         self.similarity = similarity
         self.description = description
         self.match_quality = match_quality
     
     def __str__(self):
+        # Jobs matched from the job store have no description, only an id
+        if self.description is None:
+            return f"{self.match_quality}: job {self.job_id}"
         return f"{self.match_quality}: {self.description[:50]}..."
     
     def __repr__(self):
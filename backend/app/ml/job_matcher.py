@@ -1,4 +1,5 @@
-from .cosine_similarity import calculate_cosine_similarity, get_similarity_description
+import numpy as np
+from .cosine_similarity import calculate_cosine_similarities, get_similarity_descriptions
 from .tfidf import TFIDFFromScratch
 from .job_match_result import JobMatchResult
 
@@ -32,67 +33,116 @@ def display_similarity_results(results, tfidf_vocabulary, tfidf_matrix):
 def calculate_similarity_results(all_documents):
     """
     Calculate TF-IDF and cosine similarities using from-scratch implementation.
-    Optionally uses threading for concurrent similarity calculations.
+    All jobs are scored against the CV (row 0) in one sparse matrix-vector product.
+    The TF-IDF matrix is kept sparse, indexing a row returns a dense vector on demand.
     """
 
     tfidf = TFIDFFromScratch()
-    tfidf_matrix = tfidf.calculate_tfidf(all_documents)
+    tfidf_matrix = tfidf.calculate_tfidf_sparse(all_documents)
     
     cv_vector = tfidf_matrix[0]
     job_descriptions = all_documents[1:]
-    
-    # For small batches, sequential is fine
-    if len(job_descriptions) < 20:
-        results = _calculate_sequential(cv_vector, tfidf_matrix, job_descriptions)
-    else:
-        # For larger batches, use threading  
-        results = _calculate_parallel(cv_vector, tfidf_matrix, job_descriptions)
+
+    # Row 0 is the CV scored against itself, so drop it
+    similarities = calculate_cosine_similarities(tfidf_matrix, cv_vector)[1:]
+
+    results = _build_results(similarities, job_descriptions)
     
     return results, tfidf.vocabulary, tfidf_matrix
 
 
-def _calculate_sequential(cv_vector, tfidf_matrix, job_descriptions):
+def match_cv_against_index(cv_text, job_index, top_k=None, min_similarity=None):
     """
-    Sequential calculation for smaller job batches, not worth the overhead
+    Score a CV profile against a fitted JobCorpusIndex.
+    Only the CV is tokenised and transformed, the job vectors and norms are already precomputed.
+    Job indexes start at 1 to line up with calculate_similarity_results (index 0 was the CV).
+    With top_k and/or min_similarity only the selected jobs are returned (see select_matches).
     """
-    results = []
+    similarities = job_index.score(cv_text)
 
-    for i, job in enumerate(job_descriptions, 1):
-        similarity = calculate_cosine_similarity(cv_vector, tfidf_matrix[i])
-        match_quality = get_similarity_description(similarity)
-        results.append(JobMatchResult(i, similarity, job, match_quality))
+    positions = None
+    if top_k is not None or min_similarity is not None:
+        positions = select_matches(similarities, top_k, min_similarity)
 
-    return results
+    return _build_results(similarities, job_index.job_descriptions, positions, job_index.job_ids)
+
+
+def cv_chunk_size(job_index, max_cells=2_000_000):
+    """Number of CVs to score together so the dense (CVs x jobs) similarity block stays under max_cells values"""
+    return max(1, max_cells // max(1, len(job_index)))
 
 
-def _calculate_parallel(cv_vector, tfidf_matrix, job_descriptions, max_workers=4):
+def match_cvs_against_index(cv_texts, job_index, top_k=None, min_similarity=None, max_cells=2_000_000):
     """
-    Parallel calculation using ThreadPoolExecutor.
-    Still uses from-scratch cosine_similarity function, just runs multiple at once.
+    Score many CV profiles against a fitted JobCorpusIndex, yielding (cv position, results) one CV at a time.
+    CVs are scored in chunks, each chunk with a single sparse matrix-matrix product, and chunks are
+    sized so the dense (CVs x jobs) similarity block stays under max_cells values.
+    A CV with no relevant information yields None instead of results.
     """
+    chunk_size = cv_chunk_size(job_index, max_cells)
 
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
-    results = []
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit jobs to thread pool 
-        future_to_index = {
-            executor.submit(calculate_cosine_similarity, cv_vector, tfidf_matrix[i+1]): (i+1, job_descriptions[i])
-            for i in range(len(job_descriptions))
-        }
-        
-        # Collect results
-        for future in as_completed(future_to_index):
-            job_index, job_desc = future_to_index[future]
-            similarity = future.result()
-            match_quality = get_similarity_description(similarity)
-            results.append(JobMatchResult(job_index, similarity, job_desc, match_quality))
-    
-    # Maintain order, important for Next.JS route
-    results.sort(key=lambda x: x.job_index)
+    for start in range(0, len(cv_texts), chunk_size):
+        similarities, cv_norms = job_index.score_many(cv_texts[start:start + chunk_size])
 
-    return results
+        for offset, (cv_similarities, cv_norm) in enumerate(zip(similarities, cv_norms)):
+            if cv_norm == 0:
+                yield start + offset, None
+                continue
+
+            positions = None
+            if top_k is not None or min_similarity is not None:
+                positions = select_matches(cv_similarities, top_k, min_similarity)
+
+            yield start + offset, _build_results(cv_similarities, job_index.job_descriptions, positions, job_index.job_ids)
+
+
+def select_matches(similarities, top_k=None, min_similarity=None):
+    """
+    Positions of the jobs to return. min_similarity drops weaker jobs (keeping job order),
+    top_k keeps the k most similar using a partial selection (argpartition) instead of a
+    full sort, and orders just those k by similarity, highest first (ties by job order).
+    """
+    positions = np.arange(len(similarities))
+
+    if min_similarity is not None:
+        positions = np.flatnonzero(similarities >= min_similarity)
+
+    if top_k is not None:
+        if top_k < len(positions):
+            candidates = similarities[positions]
+            # The k-th highest similarity by partial selection, then every job above it and as many of the
+            # jobs tied on it as still fit, earliest first (argpartition alone picks among those arbitrarily)
+            cutoff = -np.partition(-candidates, top_k - 1)[top_k - 1]
+            above = positions[candidates > cutoff]
+            positions = np.concatenate([above, positions[candidates == cutoff][:top_k - len(above)]])
+
+        # lexsort sorts by the last key first: similarity descending, then job order
+        positions = positions[np.lexsort((positions, -similarities[positions]))]
+
+    return positions
+
+
+def _build_results(similarities, job_descriptions, positions=None, job_ids=None):
+    """
+    Bucket the similarities at once and build JobMatchResults (job indexes start at 1),
+    in job order or for just the given positions, with the index's job ids when given
+    """
+    if positions is None:
+        positions = range(len(similarities))
+
+    selected = similarities[positions]
+    match_qualities = get_similarity_descriptions(selected)
+
+    return [
+        JobMatchResult(
+            int(position) + 1,
+            similarity,
+            job_descriptions[position] if job_descriptions is not None else None,
+            str(match_quality),
+            job_ids[position] if job_ids is not None else None
+        )
+        for position, similarity, match_quality in zip(positions, selected, match_qualities)
+    ]
 
 def test_similarity(all_documents, print_results=False):
     """
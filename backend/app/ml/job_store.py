@@ -0,0 +1,277 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import tokenizer
+from .config import job_store_db_path, job_store_batch_size
+from .job_index import IncrementalJobIndex
+from .tfidf import TFIDFFromScratch
+
+
+def _preprocess_version(term_table=None) -> str:
+    """
+    Fingerprint of everything that decides a job's term counts: the tokenizer's word -> (term, weight) table,
+    which already folds in the aliases, the term lists and the skill/experience weights, plus the word pattern
+    and the scikit-learn rule. Stored term counts from another version would disagree with freshly tokenised
+    CVs, so the store re-preprocesses its jobs when it changes.
+    """
+    term_table = tokenizer.term_table if term_table is None else term_table
+    inputs = {
+        "word_pattern": tokenizer.word_pattern.pattern,
+        "term_table": sorted((word, term, weight) for word, (term, weight) in term_table.items()),
+        "scikit_learn_entry": tokenizer.scikit_learn_entry,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()[:16]
+
+
+preprocess_version = _preprocess_version()
+
+
+def hash_job(title: Optional[str], description: str) -> str:
+    """Content address of a job, an unchanged job keeps its stored term counts"""
+    return hashlib.sha256(f"{title or ''}\x00{description}".encode('utf-8')).hexdigest()
+
+
+class JobStore:
+    """
+    Jobs kept by the backend itself, so match requests send job ids instead of every description.
+    Each job is stored in SQLite with its preprocessed term counts, and an IncrementalJobIndex over those
+    counts is kept in memory, so matching never tokenises a stored job again, not even after a restart.
+    Jobs other connections write to the same file (e.g. the ingest_jobs CLI) are picked up by refresh().
+    """
+
+    def __init__(self, db_path: str = job_store_db_path, batch_size: int = job_store_batch_size):
+        self.batch_size = batch_size
+
+        self._tokenizer = TFIDFFromScratch()
+        self._lock = threading.Lock()
+
+        # Ids keep their type (the frontend's jobs table uses integers, feeds often use strings),
+        # so job_id is declared without a type affinity
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL (a crash can lose the last transaction but never corrupt the file) and much faster bulk writes
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id NOT NULL PRIMARY KEY, title TEXT, description TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "term_counts TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_content_hash ON jobs (content_hash)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS job_store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        self.index = IncrementalJobIndex()
+        # Content hash of every job in the index, to tell which rows changed when another connection writes
+        self._content_hashes = {}
+        self._load()
+        self._data_version = self._read_data_version()
+
+    def _load(self):
+        row = self._db.execute("SELECT value FROM job_store_meta WHERE key = 'preprocess_version'").fetchone()
+        if row is not None and row[0] != preprocess_version:
+            self._repreprocess()
+
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO job_store_meta (key, value) VALUES ('preprocess_version', ?)", (preprocess_version,)
+            )
+
+        rows = self._db.execute("SELECT job_id, content_hash, term_counts FROM jobs ORDER BY rowid").fetchall()
+        self.index.add_documents((job_id, json.loads(term_counts), None) for job_id, _, term_counts in rows)
+        self._content_hashes = {job_id: content_hash for job_id, content_hash, _ in rows}
+
+    def _read_data_version(self) -> int:
+        # Changes whenever another connection commits to the file, never for this connection's own writes
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self) -> bool:
+        """
+        Bring the in-memory index up to date with jobs other connections have written or deleted since the
+        last refresh. Checking costs one PRAGMA, the stored hashes are only compared after a change.
+        Skipped while this store is writing itself (the next call catches up). Returns whether anything changed.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        try:
+            data_version = self._read_data_version()
+            if data_version == self._data_version:
+                return False
+
+            # One read transaction, so the hashes and term counts come from the same version of the file
+            self._db.execute("BEGIN")
+            try:
+                stored_hashes = dict(self._db.execute("SELECT job_id, content_hash FROM jobs").fetchall())
+                changed_ids = [job_id for job_id, content_hash in stored_hashes.items()
+                               if self._content_hashes.get(job_id) != content_hash]
+                term_counts = self._lookup("SELECT job_id, term_counts FROM jobs WHERE job_id IN ({})", changed_ids)
+            finally:
+                self._db.commit()
+
+            deleted_ids = [job_id for job_id in self._content_hashes if job_id not in stored_hashes]
+
+            # Only touch the index when something changed, either call drops its current snapshot
+            if changed_ids:
+                self.index.add_documents((job_id, json.loads(term_counts[job_id]), None) for job_id in changed_ids)
+            if deleted_ids:
+                self.index.remove_jobs(deleted_ids)
+
+            self._content_hashes = stored_hashes
+            self._data_version = data_version
+            return bool(changed_ids or deleted_ids)
+        finally:
+            self._lock.release()
+
+    def _repreprocess(self):
+        """The tokenizer's terms changed since the jobs were stored, tokenise the stored descriptions again"""
+        rows = self._db.execute("SELECT job_id, description FROM jobs").fetchall()
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            documents = self._tokenizer.preprocess_documents(description for _, description in batch)
+
+            with self._db:
+                self._db.executemany(
+                    "UPDATE jobs SET term_counts = ? WHERE job_id = ?",
+                    [(json.dumps(document), job_id) for (job_id, _), document in zip(batch, documents)]
+                )
+
+    def __len__(self):
+        return len(self.index)
+
+    def upsert_jobs(self, jobs: Iterable[Tuple[object, Optional[str], str]]) -> Dict[str, int]:
+        """
+        Add or update jobs given as (job_id, title, description). Jobs whose content hasn't changed are skipped,
+        the rest are tokenised together and then written batch_size jobs (one transaction) at a time.
+        Returns how many were inserted, updated and unchanged.
+        """
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        # The last occurrence of an id wins, like applying them one by one
+        jobs = list({job_id: (job_id, title, description) for job_id, title, description in jobs}.values())
+        content_hashes = [hash_job(title, description) for _, title, description in jobs]
+
+        with self._lock:
+            stored_hashes = self._stored_hashes([job_id for job_id, _, _ in jobs])
+
+            changed = []
+            for job, content_hash in zip(jobs, content_hashes):
+                stored_hash = stored_hashes.get(job[0])
+                if stored_hash == content_hash:
+                    counts["unchanged"] += 1
+                else:
+                    counts["inserted" if stored_hash is None else "updated"] += 1
+                    changed.append((job, content_hash))
+
+            # Tokenised in one go before being split into transactions, so calls of at least
+            # preprocess_parallel_threshold changed jobs are spread over the preprocessing pool
+            documents = self._tokenizer.preprocess_documents(description for (_, _, description), _ in changed)
+
+            for start in range(0, len(changed), self.batch_size):
+                self._write_batch(changed[start:start + self.batch_size], documents[start:start + self.batch_size])
+
+        return counts
+
+    def _write_batch(self, changed: List[Tuple[Tuple[object, Optional[str], str], str]], documents: List[Dict[str, int]]):
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO jobs (job_id, title, description, content_hash, term_counts, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (job_id, title, description, content_hash, json.dumps(document), now)
+                    for ((job_id, title, description), content_hash), document in zip(changed, documents)
+                ]
+            )
+
+        # Only reaches the in-memory index once it's safely on disk
+        self.index.add_documents(
+            (job_id, document, None) for ((job_id, _, _), _), document in zip(changed, documents)
+        )
+        self._content_hashes.update((job_id, content_hash) for (job_id, _, _), content_hash in changed)
+
+    def _stored_hashes(self, job_ids: List[object]) -> Dict[object, str]:
+        return self._lookup("SELECT job_id, content_hash FROM jobs WHERE job_id IN ({})", job_ids)
+
+    def stale_job_ids(self, job_ids: List[object], content_hashes: List[str]) -> List[object]:
+        """Ids whose stored job has a different content hash than the caller's copy, unknown ids are left out"""
+        with self._lock:
+            stored_hashes = self._stored_hashes(list(job_ids))
+
+        return [
+            job_id for job_id, content_hash in zip(job_ids, content_hashes)
+            if stored_hashes.get(job_id, content_hash) != content_hash
+        ]
+
+    def job_ids(self) -> List[object]:
+        """Every stored job id, so callers can find jobs they've deleted and remove them"""
+        with self._lock:
+            return [job_id for (job_id,) in self._db.execute("SELECT job_id FROM jobs ORDER BY rowid")]
+
+    def ids_by_content_hash(self, content_hashes: List[str]) -> Dict[str, Set[object]]:
+        """Ids of the stored jobs with each of the content hashes (see hash_job), several jobs can share one"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(content_hashes), 500):
+                chunk = content_hashes[start:start + 500]
+                query = "SELECT content_hash, job_id FROM jobs WHERE content_hash IN ({})".format(", ".join("?" * len(chunk)))
+                for content_hash, job_id in self._db.execute(query, chunk):
+                    found.setdefault(content_hash, set()).add(job_id)
+
+        return found
+
+    def stored_job_ids(self, job_ids: List[object]) -> Set[object]:
+        """Which of the given job ids are stored"""
+        with self._lock:
+            return set(self._stored_hashes(list(job_ids)))
+
+    def _lookup(self, query: str, keys: List[object]) -> Dict[object, object]:
+        found = {}
+        # Kept well under SQLite's limit on query parameters
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            found.update(self._db.execute(query.format(", ".join("?" * len(chunk))), chunk).fetchall())
+        return found
+
+    def remove_jobs(self, job_ids: Iterable[object]) -> int:
+        """Delete jobs by id, unknown ids are ignored. Returns how many were deleted"""
+        job_ids = list(job_ids)
+
+        with self._lock:
+            with self._db:
+                deleted = self._db.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids]).rowcount
+
+            self.index.remove_jobs(job_ids)
+            for job_id in job_ids:
+                self._content_hashes.pop(job_id, None)
+
+        return deleted
+
+    def snapshot(self):
+        """Immutable JobCorpusIndex of every stored job, rebuilt only after the jobs change"""
+        self.refresh()
+        return self.index.snapshot()
+
+    def stats(self):
+        """Counters for health checks"""
+        return {"jobs": len(self), "preprocess_version": preprocess_version}
+
+    def close(self):
+        self._db.close()
+
+
+_job_store = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """The API process's job store, opened (and its index loaded) on first use"""
+    global _job_store
+
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore()
+        return _job_store
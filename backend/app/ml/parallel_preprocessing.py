@@ -0,0 +1,93 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .tokenizer import tokenize, term_list, term_ids
+from .config import preprocess_workers, preprocess_parallel_threshold, preprocess_chunk_size
+
+# Persistent pool shared by every large batch, created on first use
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def preprocess_many(texts, workers=None, parallel_threshold=None, chunk_size=None):
+    """
+    Tokenise many documents, returning {term: weighted count} per document in input order.
+    Batches of at least parallel_threshold documents are split into chunks of chunk_size
+    and tokenised by a persistent process pool, smaller batches are done in-process.
+    """
+    workers = preprocess_workers if workers is None else workers
+    parallel_threshold = preprocess_parallel_threshold if parallel_threshold is None else parallel_threshold
+    chunk_size = preprocess_chunk_size if chunk_size is None else chunk_size
+
+    texts = list(texts)
+
+    # Not worth the process start-up and transfer overhead for small batches
+    if workers <= 1 or len(texts) < parallel_threshold:
+        return [tokenize(text) for text in texts]
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+    term_counts = []
+    for encoded_chunk in _get_pool(workers).map(_preprocess_chunk, chunks):
+        term_counts.extend(_decode_chunk(*encoded_chunk))
+
+    return term_counts
+
+
+def shutdown_pool():
+    """Stop the worker processes, e.g. when the API shuts down"""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+            _pool_workers = None
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+
+            # spawn rather than fork, forking a process that is already running threads (uvicorn) isn't safe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+
+        return _pool
+
+
+def _preprocess_chunk(texts):
+    """
+    Runs in a worker process. Encodes the chunk's term counts as three flat arrays
+    (offsets, term ids, counts) which are far cheaper to send back than dicts of strings.
+    """
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    ids = []
+    counts = []
+
+    for i, text in enumerate(texts):
+        for term, count in tokenize(text).items():
+            ids.append(term_ids[term])
+            counts.append(count)
+        offsets[i + 1] = len(ids)
+
+    return offsets, np.array(ids, dtype=np.int32), np.array(counts, dtype=np.int32)
+
+
+def _decode_chunk(offsets, ids, counts):
+    """Turn a chunk's flat arrays back into one {term: weighted count} dict per document"""
+    terms = [term_list[term_id] for term_id in ids.tolist()]
+    counts = counts.tolist()
+
+    return [
+        dict(zip(terms[start:end], counts[start:end]))
+        for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+    ]
@@ -0,0 +1,114 @@
+import re
+from typing import Dict, List, Optional
+from .config import experience_indicators
+from .budget import unlimited
+from .patterns import section_patterns, contact_patterns, experience_patterns, education_patterns
+
+# Compiled once at import from the raw strings in patterns.py, so no request ever compiles or looks up a regex
+
+
+def _without_inline_flag(pattern: str) -> str:
+    # Section patterns carry their own (?i), which can't sit in the middle of a combined pattern
+    return pattern[len('(?i)'):] if pattern.startswith('(?i)') else pattern
+
+
+def _build_section_classifier():
+    """
+    One pattern that says which section heading (if any) a line is.
+    Each section is a lookahead tried in the order of section_patterns, so when a line matches several
+    (e.g. "Work Experience and Projects") the first section in the dict still wins, as it always has.
+    """
+    alternatives = [
+        f'(?=.*?(?:{_without_inline_flag(pattern)}))(?P<{section_name}>)'
+        for section_name, pattern in section_patterns.items()
+    ]
+    return re.compile(r'\A(?:' + '|'.join(alternatives) + ')', re.IGNORECASE)
+
+
+def _build_scanner(family: str, patterns: List[str]):
+    """
+    Combine a list of findall-style patterns (one capture group each) into a single zero-width scanner.
+    Every alternative sits in a lookahead, so one pass reports where each pattern matches without
+    one pattern's match hiding another's, and the named group tells us which pattern it was.
+    """
+    alternatives = []
+    for i, pattern in enumerate(patterns):
+        if re.compile(pattern).groups != 1:
+            raise ValueError(f"{family} pattern {pattern!r} must have exactly one capture group")
+        alternatives.append(f'(?P<{family}_{i}>{pattern})')
+
+    return re.compile('(?=' + '|'.join(alternatives) + ')', re.IGNORECASE)
+
+
+section_classifier = _build_section_classifier()
+compiled_contact_patterns = {info_type: re.compile(pattern) for info_type, pattern in contact_patterns.items()}
+experience_scanner = _build_scanner('experience', experience_patterns)
+education_scanner = _build_scanner('education', education_patterns)
+
+
+def classify_line(line: str) -> Optional[str]:
+    """Section name if the (stripped) line is a section heading, otherwise None"""
+    # Headings are short, long lines are never checked against the patterns
+    if len(line) >= 50:
+        return None
+
+    match = section_classifier.match(line)
+    return match.lastgroup if match else None
+
+
+def extract_contact_info(text: str, stage=unlimited) -> Dict[str, str]:
+    # First match of each contact pattern, each search stops as soon as it finds one
+    contact_info = {}
+
+    for info_type, pattern in compiled_contact_patterns.items():
+        if stage.expired():
+            break
+
+        match = pattern.search(text)
+        if match:
+            contact_info[info_type] = match.group(0)
+
+    return contact_info
+
+
+def _scan(scanner, family: str, n_patterns: int, text: str, stage=unlimited) -> List[str]:
+    """
+    Captured values for every pattern of a family from a single pass over the text, grouped by pattern
+    in list order. A pattern's matches never overlap each other, the same as running re.findall per pattern.
+    Stops at the stage deadline, returning the values found up to that point.
+    """
+    found = [[] for _ in range(n_patterns)]
+    # End of the last accepted match per pattern, a new match of that pattern must start after it
+    last_end = [0] * n_patterns
+
+    for match in scanner.finditer(text):
+        if stage.expired():
+            break
+
+        i = int(match.lastgroup[len(family) + 1:])
+        group = f'{family}_{i}'
+        start, end = match.span(group)
+
+        if start < last_end[i]:
+            continue
+
+        # The pattern's own capture group is the one straight after the wrapping named group
+        found[i].append(match.group(scanner.groupindex[group] + 1) or '')
+        last_end[i] = end if end > start else start + 1
+
+    return [value for values in found for value in values]
+
+
+def extract_experience_indicators(text: str, stage=unlimited) -> List[str]:
+    # Extract phrases that indicate work experience, then any single-word indicators
+    indicators = _scan(experience_scanner, 'experience', len(experience_patterns), text, stage)
+    if stage.expired():
+        return indicators
+
+    indicators.extend(word for word in text.split(" ") if word in experience_indicators)
+    return indicators
+
+
+def extract_education_info(text: str, stage=unlimited) -> List[str]:
+    # Extract degrees, institutions and qualifications
+    return _scan(education_scanner, 'education', len(education_patterns), text, stage)
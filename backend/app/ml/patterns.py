@@ -9,22 +9,24 @@ section_patterns = {
 }
 
 contact_patterns = {
-    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    # Local part and domain capped at their RFC lengths so long runs of dots and dashes can't backtrack quadratically
+    'email': r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,253}\.[A-Z|a-z]{2,24}\b',
     'phone': r'(\+\d{1,3}[-.\s]?)?\(?\d{3,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{3,4}',
     'linkedin': r'linkedin\.com/in/[\w-]+',
     'github': r'github\.com/[\w-]+'
 }
 
+# Free-text tails are capped at 200 characters and year counts at 3 digits (not starting mid-number), so
+# CVs with huge punctuation-free blocks (e.g. text exported from tables) stay linear to scan
 experience_patterns = [
-    r'(\d+)\+?\s*years?\s+(?:of\s+)?experience',
-    r'experienced?\s+in\s+([^.]+)',
-    r'worked?\s+(?:as\s+)?(?:a\s+)?([^.]+)',
-    r'(\d+)\+?\s*years?\s+(?:working\s+)?with'
+    r'(?<!\d)(\d{1,3})\+?\s*years?\s+(?:of\s+)?experience',
+    r'experienced?\s+in\s+([^.]{1,200})',
+    r'worked?\s+(?:as\s+)?(?:a\s+)?([^.]{1,200})',
+    r'(?<!\d)(\d{1,3})\+?\s*years?\s+(?:working\s+)?with'
 ]
 
 education_patterns = [
-    r'(BSc|MSc|BA|MA|PhD|Bachelor|Master|Degree)\s+[^.]+',
-    r'(University|College|School)\s+[^.]+',
-    r'(GCSE|A-Level|A Level)\s+[^.]*'
+    r'(BSc|MSc|BA|MA|PhD|Bachelor|Master|Degree)\s+[^.]{1,200}',
+    r'(University|College|School)\s+[^.]{1,200}',
+    r'(GCSE|A-Level|A Level)\s+[^.]{0,200}'
 ]
-
@@ -0,0 +1,169 @@
+import io
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+import pdfplumber
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LAParams, LTTextContainer, LTTextLine
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+from .config import pdf_extractor_backend, pdf_max_pages
+from .exceptions import PDFPassingError
+
+
+def _open_stream(pdf_source):
+    # Sources are either the PDF's bytes or a path on disk (see extract_cv_text)
+    return io.BytesIO(pdf_source) if isinstance(pdf_source, bytes) else open(pdf_source, 'rb')
+
+
+def _catalogue_page_count(document: PDFDocument) -> Optional[int]:
+    # Page count the PDF declares at the root of its page tree (/Pages /Count), None when it's missing or malformed
+    try:
+        count = resolve1(resolve1(document.catalog['Pages'])['Count'])
+    except Exception:
+        return None
+    return count if isinstance(count, int) and count >= 0 else None
+
+
+def _enumerate_pages(document: PDFDocument, page_limit: int = pdf_max_pages) -> Tuple[List[PDFPage], int]:
+    """
+    The document's pages (at most page_limit + 1 of them, so a huge PDF costs no more than that) and its page count.
+    Only the page tree is read, not the pages' content. The declared /Count has to agree with the pages found,
+    otherwise a PDF could claim a few pages to get past the page limit, or more than it has.
+    """
+    pages = list(islice(PDFPage.create_pages(document), page_limit + 1))
+    declared = _catalogue_page_count(document)
+
+    if len(pages) > page_limit:
+        # Over the limit either way, the declared count says by how much unless it claims fewer pages than were found
+        if declared is not None and declared < len(pages):
+            raise PDFPassingError(f"PDF declares {declared} pages but has more than {page_limit}")
+        return pages, len(pages) if declared is None else declared
+
+    if declared is not None and declared != len(pages):
+        raise PDFPassingError(f"PDF declares {declared} pages but has {len(pages)}")
+
+    return pages, len(pages)
+
+
+class PDFExtractor(ABC):
+    """
+    A way of turning PDF pages into plain text. open() returns a document (use it as a context manager)
+    with page_count and extract_page(page_number), so extract_cv_text can check limits, fan pages out
+    to workers and join the results the same way whichever backend is used.
+    """
+    name = None
+
+    @abstractmethod
+    def open(self, pdf_source):
+        ...
+
+
+class PDFPlumberDocument:
+    def __init__(self, pdf_source):
+        self._pdf = pdfplumber.open(io.BytesIO(pdf_source) if isinstance(pdf_source, bytes) else pdf_source)
+        try:
+            # pdfplumber builds every page object the first time .pages is used, so only after the page limit check
+            _, self.page_count = _enumerate_pages(self._pdf.doc)
+        except Exception:
+            self._pdf.close()
+            raise
+
+    def extract_page(self, page_number: int) -> str:
+        return self._pdf.pages[page_number].extract_text()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pdf.close()
+
+
+class PDFPlumberExtractor(PDFExtractor):
+    """The original path, builds pdfplumber's character and layout objects for every page"""
+    name = "pdfplumber"
+
+    def open(self, pdf_source):
+        return PDFPlumberDocument(pdf_source)
+
+
+class PDFMinerDocument:
+    # Points two lines' baselines can differ by and still count as one line (pdfplumber's y_tolerance)
+    line_tolerance = 3
+
+    def __init__(self, pdf_source, laparams):
+        self._stream = _open_stream(pdf_source)
+        try:
+            document = PDFDocument(PDFParser(self._stream))
+            # Only the page tree so far, no page is interpreted until extract_page()
+            self._pages, self.page_count = _enumerate_pages(document)
+        except Exception:
+            self._stream.close()
+            raise
+
+        resource_manager = PDFResourceManager(caching=True)
+        self._device = PDFPageAggregator(resource_manager, laparams=laparams)
+        self._interpreter = PDFPageInterpreter(resource_manager, self._device)
+
+    def extract_page(self, page_number: int) -> str:
+        self._interpreter.process_page(self._pages[page_number])
+
+        # pdfminer hands back column-shaped boxes, so sidebars and tables would read column by column.
+        # Rebuild the reading order pdfplumber gives instead: lines sharing a baseline, top to bottom, left to right
+        lines = sorted(
+            (line for element in self._device.get_result() if isinstance(element, LTTextContainer)
+             for line in element if isinstance(line, LTTextLine)),
+            key=lambda line: (-line.y0, line.x0)
+        )
+
+        rows = []
+        for line in lines:
+            text = line.get_text().strip()
+            if not text:
+                continue
+            if rows and abs(rows[-1][0] - line.y0) <= self.line_tolerance:
+                rows[-1][1].append((line.x0, text))
+            else:
+                rows.append((line.y0, [(line.x0, text)]))
+
+        return "\n".join(" ".join(text for _, text in sorted(row)) for _, row in rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stream.close()
+
+
+class PDFMinerExtractor(PDFExtractor):
+    """
+    pdfminer's low-level interpreter with layout analysis tuned down: characters are still grouped into
+    lines, but the costly hierarchical text box grouping (boxes_flow) and vertical text detection are off
+    and no pdfplumber objects are built.
+    """
+    name = "pdfminer"
+
+    laparams = LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+
+    def open(self, pdf_source):
+        return PDFMinerDocument(pdf_source, self.laparams)
+
+
+pdf_extractors: Dict[str, PDFExtractor] = {
+    extractor.name: extractor for extractor in (PDFPlumberExtractor(), PDFMinerExtractor())
+}
+
+
+def get_pdf_extractor(name: Optional[str] = None) -> PDFExtractor:
+    """Extractor by name, defaulting to pdf_extractor_backend from config"""
+    name = name or pdf_extractor_backend
+
+    if name not in pdf_extractors:
+        raise PDFPassingError(f"Unknown PDF extractor '{name}', available: {', '.join(pdf_extractors)}")
+
+    return pdf_extractors[name]
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from .config import (
+    result_sink_kind, result_sink_path, result_sink_queue_size, result_sink_batch_size,
+    result_sink_ndjson_max_bytes, result_sink_ndjson_backups
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink(ABC):
+    """
+    Somewhere finished analyses are kept. write_batch() is only ever called by the ResultWriter's single
+    writer task (in a worker thread), so sinks don't need their own locking.
+    """
+    name = None
+
+    @abstractmethod
+    def write_batch(self, records: List[dict]):
+        ...
+
+    def close(self):
+        pass
+
+
+class NullSink(ResultSink):
+    """Results aren't kept anywhere"""
+    name = "off"
+
+    def write_batch(self, records: List[dict]):
+        pass
+
+
+class FileSink(ResultSink):
+    """
+    The latest analysis as one JSON document, what analysis_results.json always held. Written to a temp file
+    and renamed over the old one, so readers never see a half-written file.
+    """
+    name = "file"
+
+    def __init__(self, path: str = "analysis_results.json"):
+        self.path = path
+
+    def write_batch(self, records: List[dict]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as temp_file:
+            json.dump(records[-1]["analysis"], temp_file, indent=4)
+        os.replace(temp_file.name, self.path)
+
+
+class SQLiteSink(ResultSink):
+    """Every analysis as a row, one transaction per batch"""
+    name = "sqlite"
+
+    def __init__(self, path: str = "analysis_results.db"):
+        # Opened by the event loop thread, then only used from the writer task's worker threads one at a time
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_results ("
+            "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, filename TEXT, content_hash TEXT, "
+            "extractor TEXT, result TEXT NOT NULL)"
+        )
+
+    def write_batch(self, records: List[dict]):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO analysis_results (created_at, filename, content_hash, extractor, result) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (record["created_at"], record.get("filename"), record.get("content_hash"),
+                     record.get("extractor"), json.dumps(record["analysis"]))
+                    for record in records
+                ]
+            )
+
+    def close(self):
+        self._db.close()
+
+
+class NDJSONSink(ResultSink):
+    """
+    Every analysis as one JSON line, appended. Once the log passes max_bytes it's rotated like logging's
+    RotatingFileHandler (results.ndjson -> results.ndjson.1 -> ...), keeping the given number of old logs.
+    """
+    name = "ndjson"
+
+    def __init__(self, path: str = "analysis_results.ndjson",
+                 max_bytes: int = result_sink_ndjson_max_bytes, backups: int = result_sink_ndjson_backups):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def write_batch(self, records: List[dict]):
+        # A whole batch goes in with one write, lines are never interleaved as there's only one writer
+        data = "".join(json.dumps(record) + "\n" for record in records)
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+            self._rotate()
+
+        with open(self.path, 'a') as f:
+            f.write(data)
+
+    def _rotate(self):
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+
+        for number in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{number}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+result_sinks = {sink.name: sink for sink in (NullSink, FileSink, SQLiteSink, NDJSONSink)}
+
+
+def create_result_sink(kind: str = result_sink_kind, path: Optional[str] = result_sink_path) -> ResultSink:
+    """Sink by name ("off", "file", "sqlite" or "ndjson"), at path or the sink's default file"""
+    if kind not in result_sinks:
+        raise ValueError(f"Unknown result sink '{kind}', available: {', '.join(result_sinks)}")
+
+    sink_class = result_sinks[kind]
+    if sink_class is NullSink or not path:
+        return sink_class()
+    return sink_class(path)
+
+
+class ResultWriter:
+    """
+    Write-behind persistence for finished analyses. Request handlers submit() without waiting, records wait
+    in a bounded queue and a single background task writes them to the sink in batches, off the event loop.
+    When the queue is full the record is dropped (and counted) rather than slowing the response down.
+    """
+
+    def __init__(self, sink: ResultSink, max_queue: int = result_sink_queue_size,
+                 batch_size: int = result_sink_batch_size):
+        self.sink = sink
+        self.batch_size = batch_size
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._max_queue = max_queue
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """Start the writer task, call from inside the running event loop (the API's lifespan)"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self._max_queue)
+            self._task = asyncio.create_task(self._run(), name="result-writer")
+
+    def submit(self, record: dict) -> bool:
+        """Queue a record for writing, never blocks. False if it was dropped"""
+        if self._queue is None or isinstance(self.sink, NullSink):
+            return False
+
+        record.setdefault("created_at", time.time())
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Whatever else is already waiting goes in the same write
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(self.sink.write_batch, batch)
+                self.written += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Writing %d analysis results to the %s sink failed", len(batch), self.sink.name)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def stop(self, timeout: float = 5.0):
+        """Write whatever is still queued (for up to timeout seconds), then stop the task and close the sink"""
+        if self._task is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopped the result writer with %d results unwritten", self._queue.qsize())
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self._task = None
+        self._queue = None
+        self.sink.close()
+
+    def stats(self) -> Dict[str, object]:
+        """Counters for health checks"""
+        return {
+            "sink": self.sink.name,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+
+# Shared by every request in the API process, started and stopped by the API's lifespan
+result_writer = ResultWriter(create_result_sink())
@@ -0,0 +1,138 @@
+from collections import deque
+from typing import Dict, List
+from .config import programming_languages, frameworks_libraries, databases, cloud_tools
+from .budget import unlimited
+
+# Categories in the order they appear in the analysis results
+skill_categories = {
+    'programming_languages': programming_languages,
+    'frameworks_libraries': frameworks_libraries,
+    'databases': databases,
+    'cloud_tools': cloud_tools,
+}
+
+
+class SkillMatch:
+    """A single skill found in the text, with the character offsets of the matched variation in that text"""
+
+    def __init__(self, skill, category, start, end):
+        self.skill = skill
+        self.category = category
+        self.start = start
+        self.end = end
+
+    @property
+    def display_name(self):
+        # Same formatting the analysis has always returned, short skills like C# or R in upper case
+        return self.skill.upper() if len(self.skill) <= 2 else self.skill.title()
+
+    def __repr__(self):
+        return f"SkillMatch('{self.skill}', '{self.category}', {self.start}, {self.end})"
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over every skill and its variations (e.g. "node.js" -> "nodejs",
+    "spring boot" -> "springboot"), built once so a CV is scanned a single time no matter
+    how many skills the taxonomy holds. Multi-word skills are just longer patterns.
+    """
+
+    def __init__(self, categories):
+        # Trie as parallel lists: goto[state] = {char: next_state}, outputs[state] = [(skill, category, length)]
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.categories = list(categories)
+
+        for category, skills in categories.items():
+            for skill in skills:
+                for variation in {skill, skill.replace(".", ""), skill.replace(" ", "")}:
+                    if variation:
+                        self._add_pattern(variation, skill, category)
+
+        self._build_fail_links()
+
+    def _add_pattern(self, pattern, skill, category):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = next_state
+
+        self.outputs[state].append((skill, category, len(pattern)))
+
+    def _build_fail_links(self):
+        # Breadth first, so every state's fail target is resolved before its children need it
+        queue = deque(self.goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+
+                # Patterns that end on a suffix of this state also end here
+                self.outputs[next_state] = self.outputs[next_state] + self.outputs[self.fail[next_state]]
+
+    def find_all(self, text: str, stage=unlimited) -> List[SkillMatch]:
+        """
+        Every whole-word occurrence of a skill in the text, in order of where it ends.
+        "C" is not found in "Cafe Manager" because the characters either side of a match
+        must not be letters or digits. Stops at the stage deadline (checked every 4096 characters).
+        """
+        lowered = text.lower()
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+
+        # Lowercasing can lengthen the text (e.g. "İ" becomes "i" and a combining dot), then every later
+        # offset would be shifted, so each lowered character is mapped back to the one it came from
+        origins = None
+        if len(lowered) != len(text):
+            origins = [index for index, char in enumerate(text) for _ in char.lower()]
+        text = lowered
+
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            if not position & 4095 and stage.expired():
+                break
+
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for skill, category, length in outputs[state]:
+                start, end = position + 1 - length, position + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < len(text) and text[end].isalnum():
+                    continue
+                if origins is not None:
+                    start, end = origins[start], origins[end - 1] + 1
+                matches.append(SkillMatch(skill, category, start, end))
+
+        return matches
+
+    def find_by_category(self, text: str, stage=unlimited) -> Dict[str, List[str]]:
+        """Display names of the skills found, per category, each listed once in order of first occurrence"""
+        found = {category: [] for category in self.categories}
+        seen = set()
+
+        for match in sorted(self.find_all(text, stage), key=lambda match: match.start):
+            if match.skill not in seen:
+                seen.add(match.skill)
+                found[match.category].append(match.display_name)
+
+        return found
+
+
+# Built once at import and shared, the automaton is read-only after construction
+skill_matcher = SkillMatcher(skill_categories)
@@ -0,0 +1,162 @@
+import numpy as np
+
+
+class CSRMatrix:
+    """
+    Compressed Sparse Row matrix built from scratch for the TF-IDF pipeline.
+    Row i is stored as indices[indptr[i]:indptr[i+1]] (column ids) and
+    data[indptr[i]:indptr[i+1]] (values), so only non-zero entries take up memory.
+    """
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.shape = (int(shape[0]), int(shape[1]))
+
+    @classmethod
+    def from_rows(cls, rows, n_cols):
+        """
+        Build the matrix from an iterable of {column_index: value} dicts, one per row.
+        Columns are sorted within each row so row slices are always in column order.
+        """
+        indptr = [0]
+        indices = []
+        data = []
+
+        for row in rows:
+            for col in sorted(row):
+                indices.append(col)
+                data.append(row[col])
+            indptr.append(len(indices))
+
+        return cls(indptr, indices, data, (len(indptr) - 1, n_cols))
+
+    @property
+    def nnz(self):
+        """Number of stored (non-zero) entries"""
+        return len(self.data)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, row):
+        """
+        Dense view of a single row so existing code that indexes tfidf_matrix[i]
+        (e.g. display_similarity_results) keeps working.
+        """
+        return self.row(row)
+
+    def row(self, i):
+        """Return row i as a dense numpy vector"""
+        if i < 0:
+            i += self.shape[0]
+        if not 0 <= i < self.shape[0]:
+            raise IndexError(f"Row index {i} out of range for matrix with {self.shape[0]} rows")
+
+        start, end = self.indptr[i], self.indptr[i + 1]
+        dense_row = np.zeros(self.shape[1])
+        dense_row[self.indices[start:end]] = self.data[start:end]
+        return dense_row
+
+    def row_ids(self):
+        """Row index of every stored entry, lined up with self.indices and self.data"""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def row_norms(self):
+        """Euclidean norm of every row, computed from the stored entries only"""
+        squared_sums = np.bincount(self.row_ids(), weights=self.data ** 2, minlength=self.shape[0])
+        return np.sqrt(squared_sums)
+
+    def dot(self, vector):
+        """
+        Matrix-vector product with a dense vector of length n_cols.
+        Only touches the non-zero entries, so the cost is O(nnz) rather than O(rows x cols).
+        """
+        vector = np.asarray(vector, dtype=np.float64)
+        if vector.shape != (self.shape[1],):
+            raise ValueError(f"Vector of shape {vector.shape} does not match matrix with {self.shape[1]} columns")
+
+        products = self.data * vector[self.indices]
+        return np.bincount(self.row_ids(), weights=products, minlength=self.shape[0])
+
+    def transpose(self):
+        """Transposed matrix, still in CSR form (so its rows are this matrix's columns)"""
+        order = np.argsort(self.indices, kind='stable')
+
+        indptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.shape[1]), out=indptr[1:])
+
+        return CSRMatrix(indptr, self.row_ids()[order], self.data[order], (self.shape[1], self.shape[0]))
+
+    def matmul_transpose(self, other_transposed):
+        """
+        Dense product self @ other.T, given other already transposed (see transpose()).
+        Every stored entry (row r, column t, value a) adds a * other.T[t] into result row r,
+        so the work is proportional to the matching non-zero pairs, not rows x columns x vocabulary.
+        """
+        n_rows, n_other = self.shape[0], other_transposed.shape[1]
+
+        starts = other_transposed.indptr[self.indices]
+        lengths = other_transposed.indptr[self.indices + 1] - starts
+
+        # Positions in other_transposed of every pair, one contiguous run per entry of self
+        run_starts = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=run_starts[1:])
+        positions = np.repeat(starts - run_starts, lengths) + np.arange(lengths.sum())
+
+        result_rows = np.repeat(self.row_ids(), lengths)
+        result_cols = other_transposed.indices[positions]
+        products = np.repeat(self.data, lengths) * other_transposed.data[positions]
+
+        result = np.bincount(result_rows * n_other + result_cols, weights=products, minlength=n_rows * n_other)
+        return result.reshape(n_rows, n_other)
+
+    def scale_columns(self, weights):
+        """New matrix with every column j multiplied by weights[j] (e.g. TF values times IDF)"""
+        weights = np.asarray(weights, dtype=np.float64)
+        return CSRMatrix(self.indptr, self.indices, self.data * weights[self.indices], self.shape)
+
+    def select_rows(self, rows):
+        """New matrix containing only the given rows, in the given order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = np.diff(self.indptr)[rows]
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        # Position of every kept entry in the original arrays, one contiguous run per row
+        positions = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+
+        return CSRMatrix(indptr, self.indices[positions], self.data[positions], (len(rows), self.shape[1]))
+
+    @classmethod
+    def vstack(cls, matrices, n_cols):
+        """Stack matrices on top of each other, widening them all to n_cols columns"""
+        indptr = [np.zeros(1, dtype=np.int64)]
+        offset = 0
+        for matrix in matrices:
+            indptr.append(matrix.indptr[1:] + offset)
+            offset += matrix.nnz
+
+        return cls(
+            np.concatenate(indptr),
+            np.concatenate([matrix.indices for matrix in matrices]) if matrices else [],
+            np.concatenate([matrix.data for matrix in matrices]) if matrices else [],
+            (sum(matrix.shape[0] for matrix in matrices), n_cols)
+        )
+
+    def freeze(self):
+        """Mark the underlying arrays read-only so the matrix can be shared safely between threads"""
+        for array in (self.indptr, self.indices, self.data):
+            array.setflags(write=False)
+        return self
+
+    def toarray(self):
+        """Dense numpy copy of the whole matrix, only build this when a caller really needs it"""
+        dense = np.zeros(self.shape)
+        dense[self.row_ids(), self.indices] = self.data
+        return dense
+
+    def __repr__(self):
+        return f"CSRMatrix(shape={self.shape}, nnz={self.nnz})"
@@ -1,76 +1,110 @@
-import numpy as np
 import math 
+import sys
+import hashlib
 from collections import Counter
-import re
-from .config import job_terms, all_technical_skills, experience_indicators
+from .tokenizer import tokenize
+from .parallel_preprocessing import preprocess_many
+from .cache import LRUCache
+from .config import preprocess_cache_max_entries, preprocess_cache_max_bytes
 from .exceptions import TFIDFCalculationError, InsufficientDataError
+from .sparse_matrix import CSRMatrix
+
+def _term_counts_size(term_counts):
+    # The term strings are shared with the tokenizer's term table, so only count the dict and its values
+    return sys.getsizeof(term_counts) + sum(sys.getsizeof(count) for count in term_counts.values())
+
+
+# Shared by every TFIDFFromScratch instance so job descriptions are only tokenised once per process
+preprocess_cache = LRUCache(
+    max_entries=preprocess_cache_max_entries,
+    max_bytes=preprocess_cache_max_bytes,
+    sizeof=_term_counts_size
+)
+
 
 class TFIDFFromScratch:
     """
     TF-IDF implementation from scratch to understand the mathematics behind text similarity.
     Defaults to smart preprocessing optimised for CV and job description matching.
+    With smooth_idf, IDF is calculated as if one extra document (the CV being matched)
+    contained every word. That only matches fitting on CV + jobs together for the words the
+    CV really contains, JobCorpusIndex corrects the job norms for the rest when scoring.
+    Preprocessed documents are cached by content hash, pass cache=None to skip the cache.
     """
 
-    def __init__(self):
+    def __init__(self, smooth_idf=False, cache=preprocess_cache):
         # Initialise variables to store vocabulary, IDF values and processed documents
+        self.smooth_idf = smooth_idf
+        self.cache = cache
+        self.total_documents = 0
         self.vocabulary = []
+        self.vocabulary_index = {}
         self.idf_values = {}
         self.documents = []
+        self.inverted_index = {}
         self.results = []
 
     def preprocess_text(self, text: str):
         """
         Smart preprocessing focused on technical relevance.
-        Normalises skill variations and filters to relevant terms only.
+        Normalises skill variations and filters to relevant terms only, returning
+        {term: weighted count} where technical skills count x3 and experience indicators x2.
+        The result may come from the shared cache, so it must not be modified.
         """
-        # Convert to lowercase and extract words
-        text = text.lower()
-        words = re.findall(r'\b[a-zA-Z]+\b', text)
-        
-        # Normalise common variations
-        normalised_words = []
-        for word in words:
-            # Handle specific normalisations
-            if word in ['js']:
-                normalised_words.append('javascript')
-            elif word in ['nodejs', 'node']:
-                normalised_words.append('nodejs')
-            elif word in ['nextjs', 'next']:
-                normalised_words.append('nextjs')
-            elif word in ['scikit']:
-                normalised_words.append('scikit')
-            elif word == 'learn' and any('scikit' in w for w in words):
-                normalised_words.append('scikit')  # Handle scikit-learn
-            elif word == 'c++':
-                normalised_words.append('cpp')
-            elif word == 'c#':
-                normalised_words.append('csharp')
-            else:
-                normalised_words.append(word)
-        
-        # Filter to keep only relevant terms
-        filtered_words = []
-        for word in normalised_words:
-            if word in all_technical_skills:
-                filtered_words.append(word * 3)
-            elif word in experience_indicators:
-                filtered_words.append(word * 2)
-            elif word in job_terms:
-                filtered_words.append(word)
-        
-        return filtered_words
+        if self.cache is None:
+            return tokenize(text)
+
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+        term_counts = self.cache.get(key)
+        if term_counts is None:
+            term_counts = tokenize(text)
+            self.cache.put(key, term_counts)
+
+        return term_counts
+
+    def preprocess_documents(self, documents_text):
+        """
+        preprocess_text for a whole batch. Cache misses are tokenised together with
+        preprocess_many, which hands large batches to a process pool.
+        """
+        documents_text = list(documents_text)
+
+        if self.cache is None:
+            return preprocess_many(documents_text)
+
+        keys = [hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest() for text in documents_text]
+        documents = [self.cache.get(key) for key in keys]
+
+        # Tokenise each distinct missing text once, even if it appears several times in the batch
+        missing = {}
+        for key, text, document in zip(keys, documents_text, documents):
+            if document is None:
+                missing.setdefault(key, text)
+
+        if missing:
+            preprocessed = dict(zip(missing, preprocess_many(missing.values())))
+            for key, term_counts in preprocessed.items():
+                self.cache.put(key, term_counts)
 
-    def calculate_tf(self, document_words):
+            documents = [preprocessed[key] if document is None else document for key, document in zip(keys, documents)]
+
+        return documents
+
+    def calculate_tf(self, document_terms):
         """
         Calculate Term Frequency for each word in the document.
-        TF(word) = (Number of times word appears in document) / (Total words in document)
+        TF(word) = (Weighted count of word in document) / (Total weighted count in document)
+        Accepts {term: weighted count} from preprocess_text, or a plain list of words.
         """
-        total_words = len(document_words)
-        word_counts = Counter(document_words)
+        if not isinstance(document_terms, dict):
+            document_terms = Counter(document_terms)
+
+        total_words = sum(document_terms.values())
 
         # Calculate term frequency for each word
         tf_dict = {}
-        for word, count in word_counts.items():
+        for word, count in document_terms.items():
             tf_dict[word] = count / total_words
 
         return tf_dict
@@ -79,26 +113,50 @@ class TFIDFFromScratch:
         """
         Calculate Inverse Document Frequency for each word across all documents.
         IDF(word) = log(Total documents / Documents containing word)
+        or log((Total documents + 1) / (Documents containing word + 1)) with smooth_idf
+        (the IDF a word would get if the CV being matched contained it as well).
+        Document frequencies come from a single pass that also builds the
+        word -> posting list (document indexes) inverted index on self.inverted_index.
         """
         total_docs = len(documents)
-        all_words = set()
+        self.total_documents = total_docs
 
-        # Get all unique words from all documents
-        for doc in documents:
-            all_words.update(doc)
+        # Reduce each document to its unique words and record which documents contain them
+        inverted_index = {}
+        for doc_index, doc in enumerate(documents):
+            for word in set(doc):
+                inverted_index.setdefault(word, []).append(doc_index)
+
+        self.inverted_index = inverted_index
 
-        # Calculate IDF for each word
+        # Document frequency is just the length of the posting list
+        smoothing = 1 if self.smooth_idf else 0
         idf_dict = {}
-        for word in all_words:
-            containing_docs = sum(1 for doc in documents if word in doc)
-            idf_dict[word] = math.log(total_docs / containing_docs)
+        for word, postings in inverted_index.items():
+            idf_dict[word] = math.log((total_docs + smoothing) / (len(postings) + smoothing))
 
         return idf_dict
 
+    @property
+    def unseen_word_idf(self):
+        """
+        IDF of a word that no fitted document contains, only meaningful with smooth_idf
+        (the word appears in just the extra document, so IDF = log(Total documents + 1))
+        """
+        return math.log(self.total_documents + 1)
+
     def calculate_tfidf(self, documents_text):
         """
         Calculate TF-IDF vectors for all documents using smart preprocessing.
-        Returns numpy array of TF-IDF vectors.
+        Returns a dense numpy array of TF-IDF vectors, built from the sparse matrix.
+        """
+        return self.calculate_tfidf_sparse(documents_text).toarray()
+
+    def calculate_tfidf_sparse(self, documents_text):
+        """
+        Calculate TF-IDF vectors for all documents as a CSRMatrix.
+        Each row is built straight from the document's term counts, so the cost
+        scales with the number of terms in a document rather than the vocabulary size.
         """
 
         # Check if documents_text is empty 
@@ -107,7 +165,7 @@ class TFIDFFromScratch:
 
         try:
             # Preprocess all documents
-            documents = [self.preprocess_text(doc) for doc in documents_text]
+            documents = self.preprocess_documents(documents_text)
 
             # Remove empty documents after preprocessing
             non_empty_docs = [doc for doc in documents if doc]
@@ -118,40 +176,101 @@ class TFIDFFromScratch:
                     f"Only {len(non_empty_docs)}/{len(documents)} documents contained relevant information for analysis"
                 )
 
-            self.documents = documents
+            self._fit_documents(documents)
 
-            # Calculate IDF values across all documents
-            self.idf_values = self.calculate_idf(documents)
-
-            # Raise error if no vocabulary found after IDF calculation
-            if not self.idf_values:
-                raise TFIDFCalculationError("No vocabulary found after IDF calculation")
-            
-            # Build vocabulary from all unique words
-            self.vocabulary = list(self.idf_values.keys())
-
-            # Calculate TF-IDF vectors for each document
-            tfidf_vectors = []
-            for doc in documents:
-                # Calculate term frequencies for this document
-                tf_dict = self.calculate_tf(doc)
-
-                # Create TF-IDF vector for this document
-                tfidf_vector = []
-                for word in self.vocabulary:
-                    tf = tf_dict.get(word, 0)
-                    idf = self.idf_values.get(word, 0)
-                    tfidf_score = tf * idf
-                    tfidf_vector.append(tfidf_score)
-
-                tfidf_vectors.append(tfidf_vector)
+            tfidf_matrix = self._build_matrix(documents)
         
         except Exception as e:
             if isinstance(e, (TFIDFCalculationError, InsufficientDataError)):
                 raise
             raise TFIDFCalculationError(f"Error calculating TF-IDF: {str(e)}")   
 
-        return np.array(tfidf_vectors)
+        return tfidf_matrix
+
+    def fit(self, documents_text):
+        """
+        Learn the vocabulary and IDF values from a corpus (e.g. every job description)
+        without building any vectors. Documents with no relevant terms are allowed,
+        they simply end up as empty rows when transformed.
+        """
+        if not documents_text:
+            raise TFIDFCalculationError("No documents provided for anaylsis")
+
+        try:
+            documents = self.preprocess_documents(documents_text)
+
+            if not any(documents):
+                raise InsufficientDataError("None of the documents contained relevant information for analysis")
+
+            self._fit_documents(documents)
+
+        except Exception as e:
+            if isinstance(e, (TFIDFCalculationError, InsufficientDataError)):
+                raise
+            raise TFIDFCalculationError(f"Error fitting TF-IDF: {str(e)}")
+
+        return self
+
+    def transform(self, documents_text):
+        """
+        Build TF-IDF vectors for new documents (e.g. a CV profile) using the fitted vocabulary
+        and IDF values. Words outside the fitted vocabulary are ignored, and the fitted state
+        is only read, so one fitted instance can be shared between concurrent requests.
+        """
+        if not self.vocabulary:
+            raise TFIDFCalculationError("TF-IDF model has not been fitted yet")
+
+        try:
+            documents = self.preprocess_documents(documents_text)
+            return self._build_matrix(documents)
+
+        except Exception as e:
+            raise TFIDFCalculationError(f"Error transforming documents: {str(e)}")
+
+    def fit_transform(self, documents_text):
+        """Fit on the documents and return their TF-IDF matrix"""
+        return self.fit(documents_text).transform(documents_text)
+
+    def _fit_documents(self, documents):
+        """
+        Store the fitted state (documents, IDF values, vocabulary) for preprocessed documents
+        """
+        self.documents = documents
+
+        # Calculate IDF values across all documents
+        self.idf_values = self.calculate_idf(documents)
+
+        # Raise error if no vocabulary found after IDF calculation
+        if not self.idf_values:
+            raise TFIDFCalculationError("No vocabulary found after IDF calculation")
+
+        # Build vocabulary from all unique words, plus a word -> column lookup
+        self.vocabulary = list(self.idf_values.keys())
+        self.vocabulary_index = {word: i for i, word in enumerate(self.vocabulary)}
+
+    def _build_matrix(self, documents):
+        """
+        Build a CSRMatrix of TF-IDF rows for preprocessed documents against the fitted vocabulary
+        """
+        tfidf_rows = []
+        for doc in documents:
+            # Calculate term frequencies for this document (empty documents give empty rows)
+            tf_dict = self.calculate_tf(doc) if doc else {}
+
+            # Only store the terms that are in the vocabulary and have a non-zero weight
+            tfidf_row = {}
+            for word, tf in tf_dict.items():
+                column = self.vocabulary_index.get(word)
+                if column is None:
+                    continue
+
+                tfidf_score = tf * self.idf_values[word]
+                if tfidf_score != 0:
+                    tfidf_row[column] = tfidf_score
+
+            tfidf_rows.append(tfidf_row)
+
+        return CSRMatrix.from_rows(tfidf_rows, len(self.vocabulary))
 
     def display_analysis(self, documents_text):
         """
@@ -0,0 +1,79 @@
+import re
+from .config import job_terms, all_technical_skills, experience_indicators
+
+# Same words the original r'\b[a-zA-Z]+\b' found, applied once to lowercased text
+word_pattern = re.compile(r'\b[a-z]+\b')
+
+# Common variations normalised to a single term before filtering
+aliases = {
+    'js': 'javascript',
+    'node': 'nodejs',
+    'nodejs': 'nodejs',
+    'next': 'nextjs',
+    'nextjs': 'nextjs',
+    'scikit': 'scikit',
+}
+
+# Relevance weights, applied as multipliers on the term counts (technical skills count the most)
+skill_weight = 3
+experience_weight = 2
+job_term_weight = 1
+
+
+def _term_weight(term):
+    if term in all_technical_skills:
+        return skill_weight
+    if term in experience_indicators:
+        return experience_weight
+    if term in job_terms:
+        return job_term_weight
+    return 0
+
+
+def _build_term_table():
+    """
+    Precompute word -> (normalised term, weight) for every word that survives filtering,
+    so tokenising is a single dictionary lookup per distinct word.
+    """
+    term_table = {}
+    for word in {*aliases, *all_technical_skills, *experience_indicators, *job_terms}:
+        term = aliases.get(word, word)
+        weight = _term_weight(term)
+        if weight:
+            term_table[word] = (term, weight)
+    return term_table
+
+
+term_table = _build_term_table()
+
+# "learn" only counts as scikit(-learn) when scikit appears somewhere in the same text
+scikit_learn_entry = ('scikit', _term_weight('scikit'))
+
+
+def tokenize(text: str) -> dict:
+    """
+    Normalise, filter and weight a document in one pass.
+    Returns {term: weighted count}, e.g. 'Python and python' -> {'python': 6}.
+    """
+    lowered = text.lower()
+    has_scikit = 'scikit' in lowered
+
+    weighted_counts = {}
+    for word in word_pattern.findall(lowered):
+        entry = term_table.get(word)
+
+        if entry is None:
+            if word == 'learn' and has_scikit:
+                entry = scikit_learn_entry
+            else:
+                continue
+
+        term, weight = entry
+        weighted_counts[term] = weighted_counts.get(term, 0) + weight
+
+    return weighted_counts
+
+
+# Fixed id for every term tokenize() can return, used to ship term counts between processes as arrays
+term_list = tuple(sorted({term for term, _ in term_table.values()}))
+term_ids = {term: i for i, term in enumerate(term_list)}
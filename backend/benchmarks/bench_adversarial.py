@@ -0,0 +1,88 @@
+"""
+Worst-case latency benchmark for CVAnalyser.analyse_cv_test on pathological CV text: huge
+punctuation-free blocks (e.g. text exported from tables), long digit runs and email-like noise.
+
+For each input size it times the original unbounded regexes (the "before" baseline) and every
+stage of the hardened analysis, which runs on a per-stage time budget. The hardened stages should
+grow linearly with the input and never exceed analysis_stage_budget_seconds by more than one check.
+
+Run from the backend directory: python benchmarks/bench_adversarial.py
+"""
+import re
+import time
+
+import job_ads  # noqa: F401 (puts backend/app on sys.path)
+from ml.budget import StageBudget
+from ml.config import analysis_stage_budget_seconds
+from ml.cv_analysis import CVAnalyser
+
+# Copies of the original patterns.py entries, kept here as the "before" baseline
+legacy_patterns = [
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'(\+\d{1,3}[-.\s]?)?\(?\d{3,4}\)?[-.\s]?\d{3,4}[-.\s]?\d{3,4}',
+    r'(\d+)\+?\s*years?\s+(?:of\s+)?experience',
+    r'experienced?\s+in\s+([^.]+)',
+    r'worked?\s+(?:as\s+)?(?:a\s+)?([^.]+)',
+    r'(\d+)\+?\s*years?\s+(?:working\s+)?with',
+    r'(BSc|MSc|BA|MA|PhD|Bachelor|Master|Degree)\s+[^.]+',
+    r'(University|College|School)\s+[^.]+',
+    r'(GCSE|A-Level|A Level)\s+[^.]*'
+]
+
+# Repeated until the text reaches the target size
+adversarial_blocks = {
+    "table export (no full stops)": "Python | worked as a developer | experienced in AWS | 5 years with | ",
+    "long digit run": "1",
+    "digit groups": "1234 5678 ",
+    "email-like noise": "a.b-c_d%e+f",
+    "repeated headings": "Experience\nSkills\nEducation\n",
+}
+
+sizes = [5_000, 20_000, 80_000]
+
+# Legacy regexes are skipped above this size, they can take minutes
+legacy_max_size = 20_000
+
+
+def time_legacy(text):
+    start = time.perf_counter()
+    for pattern in legacy_patterns:
+        re.findall(pattern, text, re.IGNORECASE)
+    return time.perf_counter() - start
+
+
+def time_hardened(cv_analyser, text):
+    # Same stages as analyse_cv_test, without the spaCy call (linear, and not something a regex can blow up)
+    budget = StageBudget()
+    doc = cv_analyser.nlp.make_doc("")
+
+    start = time.perf_counter()
+    cv_analyser._analyse_doc(text, doc, budget)
+    return time.perf_counter() - start, budget
+
+
+if __name__ == "__main__":
+    cv_analyser = CVAnalyser()
+    worst_stage = 0.0
+
+    print(f"Stage budget: {analysis_stage_budget_seconds * 1000:.0f} ms")
+
+    for label, block in adversarial_blocks.items():
+        print(f"\n{label}")
+
+        for size in sizes:
+            text = (block * (size // len(block) + 1))[:size]
+
+            legacy = f"{time_legacy(text) * 1000:>9.1f} ms" if size <= legacy_max_size else "  skipped"
+            total, budget = time_hardened(cv_analyser, text)
+
+            slowest_stage, slowest_time = max(budget.timings.items(), key=lambda item: item[1])
+            worst_stage = max(worst_stage, slowest_time)
+
+            print(
+                f"  {size:>7,} chars  before: {legacy}  after: {total * 1000:>7.1f} ms"
+                f"  (slowest stage {slowest_stage} {slowest_time * 1000:.1f} ms"
+                f"{', over budget: ' + ', '.join(budget.exceeded) if budget.exceeded else ''})"
+            )
+
+    print(f"\nWorst single stage: {worst_stage * 1000:.1f} ms")
@@ -0,0 +1,152 @@
+"""
+Compares the PDF text extractor backends behind extract_cv_text on a corpus of synthetic CV-like PDFs,
+written by hand below so the benchmark needs nothing but the backend's own dependencies.
+
+For each backend it reports per-page latency, peak Python memory (tracemalloc) while extracting a document,
+and text parity (difflib ratio over the words, so whitespace doesn't count) against the pdfplumber baseline
+and against the text that was written into the PDF.
+
+Run from the backend directory: python benchmarks/bench_pdf_extractors.py
+"""
+import difflib
+import random
+import statistics
+import time
+import tracemalloc
+
+import job_ads  # noqa: F401 (puts backend/app on sys.path)
+from ml.cv_parser import extract_cv_text
+from ml.pdf_extractors import pdf_extractors
+
+baseline_backend = "pdfplumber"
+
+words = (
+    "python javascript react node aws docker kubernetes developer engineer team led built designed "
+    "delivered platform api services data pipeline university degree bsc experience years london manchester "
+    "improved performance customers product agile testing deployment cloud infrastructure"
+).split()
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """
+    Minimal PDF with Helvetica text. pages is a list of pages, each a list of (x, y, text) lines.
+    Objects: 1 catalog, 2 page tree, 3 font, then a page and its content stream per page.
+    """
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+
+    for i, lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        stream = "\n".join(f"BT /F1 10 Tf {x} {y} Td ({_escape(text)}) Tj ET" for x, y, text in lines).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    return bytes(pdf)
+
+
+def _sentence(rng, n_words):
+    return " ".join(rng.choice(words) for _ in range(n_words)).capitalize()
+
+
+def single_column_page(rng):
+    return [(50, 750 - 14 * row, _sentence(rng, rng.randint(6, 14))) for row in range(50)]
+
+
+def two_column_page(rng):
+    # Sidebar layouts (skills on the left, experience on the right) are common in CVs
+    left = [(40, 750 - 14 * row, _sentence(rng, 3)) for row in range(50)]
+    right = [(220, 750 - 14 * row, _sentence(rng, 9)) for row in range(50)]
+    return left + right
+
+
+def table_page(rng):
+    # Dense short cells, e.g. a skills matrix exported from a table
+    return [(40 + 110 * col, 750 - 12 * row, _sentence(rng, 2)) for row in range(60) for col in range(5)]
+
+
+def build_corpus(seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for layout in (single_column_page, two_column_page, table_page):
+        for page_count in (1, 3, 8):
+            pages = [layout(rng) for _ in range(page_count)]
+            # Written reading order: top to bottom, and left to right along a line
+            expected_text = "\n".join(text for page in pages for _, _, text in sorted(page, key=lambda line: (-line[1], line[0])))
+            corpus.append((f"{layout.__name__} x{page_count}", make_pdf(pages), page_count, expected_text))
+    return corpus
+
+
+def parity(text, reference):
+    # Compared word by word, character sequences of a whole document make SequenceMatcher take minutes
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def measure(backend, pdf, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        text = extract_cv_text(pdf, parallel=False, backend=backend)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    extract_cv_text(pdf, parallel=False, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return text, min(timings), peak
+
+
+if __name__ == "__main__":
+    corpus = build_corpus()
+    summary = {backend: {"per_page": [], "peak": [], "parity": [], "truth": []} for backend in pdf_extractors}
+
+    for label, pdf, page_count, expected_text in corpus:
+        print(f"\n{label} ({len(pdf) / 1024:.0f} KB)")
+
+        results = {backend: measure(backend, pdf) for backend in pdf_extractors}
+        baseline_text = results[baseline_backend][0]
+
+        for backend, (text, best_time, peak) in results.items():
+            per_page = best_time / page_count
+            baseline_parity = parity(text, baseline_text)
+            truth_parity = parity(text, expected_text)
+
+            summary[backend]["per_page"].append(per_page)
+            summary[backend]["peak"].append(peak)
+            summary[backend]["parity"].append(baseline_parity)
+            summary[backend]["truth"].append(truth_parity)
+
+            print(
+                f"  {backend:<11} {per_page * 1000:>7.1f} ms/page  peak {peak / 1024 / 1024:>6.1f} MB"
+                f"  parity vs {baseline_backend} {baseline_parity:.3f}  vs written text {truth_parity:.3f}"
+            )
+
+    print("\nSummary (median per-page latency, max peak memory, min parity)")
+    for backend, stats in summary.items():
+        print(
+            f"  {backend:<11} {statistics.median(stats['per_page']) * 1000:>7.1f} ms/page"
+            f"  peak {max(stats['peak']) / 1024 / 1024:>6.1f} MB"
+            f"  parity vs {baseline_backend} {min(stats['parity']):.3f}  vs written text {min(stats['truth']):.3f}"
+        )
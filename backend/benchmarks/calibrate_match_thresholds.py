@@ -0,0 +1,84 @@
+"""
+Recalibrates the match quality thresholds (ml/cosine_similarity.py) after a change to how scores are computed,
+here the weighted TF of the single-pass tokenizer: skills now count x3 and experience indicators x2 in TF,
+where the original preprocessing repeated the word ("pythonpythonpython"), which just made it a different term.
+
+Every CV analysis in the repo is scored both ways against the seeded job ads and the test request's jobs.
+Each old threshold is mapped to the new score with the same rank, so every bucket keeps the share of matches
+it had before, then the bucket agreement with the old scoring is printed for each set of thresholds.
+
+Run from the backend directory: python benchmarks/calibrate_match_thresholds.py
+"""
+import json
+
+import numpy as np
+
+import job_ads
+from bench_tokenizer import legacy_preprocess_text
+from ml.balance_cv_weight import flatten_analysis
+from ml.cosine_similarity import calculate_cosine_similarities, similarity_thresholds
+
+cv_analysis_files = [
+    job_ads.backend_dir.parent / 'test-request.json',
+    job_ads.backend_dir / 'app' / 'analysis_results.json',
+]
+
+# The thresholds the buckets were originally calibrated with, under the repeated-word preprocessing
+legacy_thresholds = np.array([0.12, 0.20, 0.28, 0.35])
+
+
+def load_cv_profiles():
+    profiles = []
+    for path in cv_analysis_files:
+        data = json.loads(path.read_text(encoding='utf-8'))
+        profiles.append(flatten_analysis(data.get("cv_analysis", data)))
+    return profiles
+
+
+def similarities(query, documents, legacy):
+    """Query scored against the documents by fitting them together, like calculate_similarity_results"""
+    from ml.tfidf import TFIDFFromScratch
+
+    tfidf = TFIDFFromScratch(cache=None)
+    if legacy:
+        tfidf.preprocess_documents = lambda texts: [legacy_preprocess_text(text) for text in texts]
+
+    # Ads with no relevant terms can't be fitted, they would score 0 either way
+    documents = [document for document in documents if tfidf.preprocess_documents([document])[0]]
+    matrix = tfidf.calculate_tfidf_sparse([query] + documents)
+    return calculate_cosine_similarities(matrix, matrix[0])[1:]
+
+
+def scored_pairs():
+    test_request = json.loads(cv_analysis_files[0].read_text(encoding='utf-8'))
+    corpora = [job_ads.load_job_ads(), test_request["job_descriptions"]]
+
+    legacy_scores, new_scores = [], []
+    for profile in load_cv_profiles():
+        for documents in corpora:
+            legacy_scores.append(similarities(profile, documents, legacy=True))
+            new_scores.append(similarities(profile, documents, legacy=False))
+
+    return np.concatenate(legacy_scores), np.concatenate(new_scores)
+
+
+def rank_matched_thresholds(legacy_scores, new_scores, thresholds):
+    """New thresholds that leave the same share of pairs at or above each old threshold"""
+    shares_above = [(legacy_scores >= threshold).mean() for threshold in thresholds]
+    return np.array([np.quantile(new_scores, 1 - share) for share in shares_above])
+
+
+if __name__ == "__main__":
+    legacy_scores, new_scores = scored_pairs()
+    calibrated = rank_matched_thresholds(legacy_scores, new_scores, legacy_thresholds)
+
+    legacy_buckets = np.searchsorted(legacy_thresholds, legacy_scores, side='right')
+    print(f"{len(legacy_scores)} CV x job pairs, new/old score ratio (median of non-zero): "
+          f"{np.median(new_scores[legacy_scores > 0] / legacy_scores[legacy_scores > 0]):.2f}")
+
+    for label, thresholds in (("legacy thresholds", legacy_thresholds),
+                              ("current thresholds", similarity_thresholds),
+                              ("calibrated", calibrated)):
+        buckets = np.searchsorted(thresholds, new_scores, side='right')
+        print(f"{label:<19} {np.round(thresholds, 3)}  same bucket as before: {(buckets == legacy_buckets).mean():.1%}"
+              f"  moved up: {(buckets > legacy_buckets).mean():.1%}")
@@ -0,0 +1,16 @@
+# Loads the real job adverts from the frontend seed file so benchmarks run on the text we actually match against
+import re
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+seed_file = backend_dir.parent / 'frontend' / 'src' / 'db' / 'seed.ts'
+
+# Make the ml package importable when running a benchmark directly (python benchmarks/bench_x.py)
+sys.path.insert(0, str(backend_dir / 'app'))
+
+
+def load_job_ads():
+    """Return every job description in the seed file"""
+    seed_source = seed_file.read_text(encoding='utf-8')
+    return re.findall(r'title: "[^"]*",\s*description:\s*"([^"]*)"', seed_source)
@@ -0,0 +1,5 @@
+# Make the ml package importable the same way main.py sees it (run from the backend directory: python -m pytest tests)
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'app'))
@@ -0,0 +1,66 @@
+from ml.cache import LRUCache
+
+
+def sized_cache(max_entries=100, max_bytes=10):
+    # Values are their own size, so the byte limit is easy to reason about
+    return LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=lambda value: value)
+
+
+def test_least_recently_used_entries_are_evicted_once_over_the_byte_limit():
+    cache = sized_cache()
+    cache.put("a", 4)
+    cache.put("b", 4)
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 4
+    cache.put("c", 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 4 and cache.get("c") == 4
+    assert cache.current_bytes == 8
+    assert cache.evictions == 1
+
+
+def test_a_large_value_evicts_as_many_entries_as_it_needs():
+    cache = sized_cache()
+    for key in "abcde":
+        cache.put(key, 2)
+
+    cache.put("big", 7)
+
+    assert [key for key in "abcde" if cache.get(key) is not None] == ["e"]
+    assert cache.current_bytes == 9
+    assert cache.evictions == 4
+
+
+def test_a_value_larger_than_the_whole_cache_is_not_stored():
+    cache = sized_cache()
+    cache.put("a", 4)
+
+    cache.put("huge", 11)
+
+    assert cache.get("huge") is None
+    assert cache.get("a") == 4
+    assert cache.evictions == 0
+
+
+def test_replacing_a_value_updates_its_size():
+    cache = sized_cache()
+    cache.put("a", 4)
+    cache.put("b", 4)
+
+    cache.put("a", 6)
+
+    # 6 + 4 still fits, nothing evicted
+    assert cache.current_bytes == 10
+    assert cache.get("b") == 4
+    assert cache.evictions == 0
+
+
+def test_the_entry_limit_applies_as_well():
+    cache = sized_cache(max_entries=2, max_bytes=1_000)
+    for key in "abc":
+        cache.put(key, 1)
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
@@ -0,0 +1,102 @@
+import os
+import signal
+
+import pytest
+
+from ml import config, cv_parser
+from ml.analysis_pool import extract_pdf_text
+from ml.cv_parser import extract_cv_text
+from ml.exceptions import PDFPassingError
+from ml.pdf_extractors import pdf_extractors
+
+PAGE_LINES = [
+    "Senior Python developer building Django and PostgreSQL APIs on AWS",
+    "Led a team of five engineers, deployed services with Docker and Kubernetes",
+    "BSc Computer Science, University of Leeds",
+]
+
+
+def make_pdf(page_count, declared_count=None):
+    """A plain PDF with page_count text pages, whose page tree declares declared_count pages (/Count)"""
+    declared_count = page_count if declared_count is None else declared_count
+    kids = " ".join(f"{4 + 2 * page} 0 R" for page in range(page_count))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {declared_count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page in range(page_count):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>".encode())
+        stream = "\n".join(["BT /F1 10 Tf 14 TL 50 750 Td"] + [f"({line}) Tj T*" for line in PAGE_LINES] + ["ET"]).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+
+@pytest.mark.parametrize("backend", sorted(pdf_extractors))
+def test_pages_are_extracted_in_order(backend):
+    text = extract_cv_text(make_pdf(3), parallel=False, backend=backend)
+    assert text.count("University of Leeds") == 3
+
+
+@pytest.mark.parametrize("backend", sorted(pdf_extractors))
+@pytest.mark.parametrize("page_count, declared_count", [(5, 2), (5, 9), (25, 1)])
+def test_a_page_count_that_disagrees_with_the_page_tree_is_rejected(backend, page_count, declared_count):
+    # e.g. a 25 page document declaring a single page would otherwise get past the page limit
+    with pytest.raises(PDFPassingError, match=f"declares {declared_count} pages"):
+        extract_cv_text(make_pdf(page_count, declared_count), parallel=False, backend=backend)
+
+
+@pytest.mark.parametrize("backend", sorted(pdf_extractors))
+def test_too_many_pages_fail_before_extraction(backend):
+    with pytest.raises(PDFPassingError, match="the maximum is 20"):
+        extract_cv_text(make_pdf(21), parallel=False, backend=backend)
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="kills the page workers with SIGKILL")
+def test_a_broken_page_pool_is_replaced_and_the_pages_retried(monkeypatch, request):
+    request.addfinalizer(cv_parser.shutdown_page_pool)
+    monkeypatch.setattr(cv_parser, "pdf_extraction_workers", 2)
+
+    pdf = make_pdf(4)
+    expected = extract_cv_text(pdf, parallel=False)
+    assert extract_cv_text(pdf) == expected
+
+    # e.g. the OS killing a worker that ran out of memory, the pool is broken for whoever uses it next
+    pool = cv_parser._page_pool
+    worker = next(iter(pool._processes.values()))
+    os.kill(worker.pid, signal.SIGKILL)
+    worker.join()
+
+    assert extract_cv_text(pdf) == expected
+    assert cv_parser._page_pool is not pool
+
+
+@pytest.mark.parametrize("page_count, workers", [(6, 2), (2, 1)])
+def test_uploads_are_extracted_by_the_page_pool_with_analyses_in_worker_processes(monkeypatch, request, page_count, workers):
+    request.addfinalizer(cv_parser.shutdown_page_pool)
+    # The default, where /api/cv/analyze extracts the pages in the API process and sends a worker only the text
+    assert config.analysis_executor_mode == "process"
+    # Only the worker count depends on the machine
+    monkeypatch.setattr(cv_parser, "pdf_extraction_workers", 2)
+
+    splits = []
+    original = cv_parser._extract_pages_parallel
+    monkeypatch.setattr(cv_parser, "_extract_pages_parallel", lambda *args: splits.append(args[3]) or original(*args))
+
+    pdf = make_pdf(page_count)
+    assert extract_pdf_text(pdf) == extract_cv_text(pdf, parallel=False)
+    # Multi-page PDFs are split over the pool's workers, short ones are still a single task for it
+    assert splits == [workers]
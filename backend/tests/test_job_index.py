@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from ml.job_index import IncrementalJobIndex, JobCorpusIndex, get_job_subset
+from ml.job_matcher import calculate_similarity_results, match_cv_against_index
+
+JOBS = {
+    "backend": "Senior Python developer building Django and PostgreSQL APIs on AWS with Docker",
+    "frontend": "React and TypeScript frontend engineer, some Node and GraphQL experience",
+    "data": "Data scientist using Python, pandas, SQL and machine learning, led a small team",
+    "devops": "DevOps engineer running Kubernetes, Terraform and AWS, built CI/CD pipelines",
+    "mobile": "Swift and Kotlin mobile developer, delivered apps with Firebase",
+    "java": "Java Spring Boot engineer, designed microservices on Azure with Kafka",
+}
+
+CV = "Python developer, built Django APIs with PostgreSQL and Docker on AWS, some React"
+
+
+def assert_same_index(index, expected):
+    """Same jobs, vocabulary, IDF and scores, regardless of row and column order"""
+    assert sorted(index.job_ids) == sorted(expected.job_ids)
+    assert sorted(index.vocabulary) == sorted(expected.vocabulary)
+    assert index.idf_values == pytest.approx(dict(expected.idf_values))
+
+    scores = dict(zip(index.job_ids, index.score(CV)))
+    expected_scores = dict(zip(expected.job_ids, expected.score(CV)))
+    assert scores == pytest.approx(expected_scores)
+
+
+def test_fitted_index_scores_match_fitting_cv_and_jobs_together():
+    descriptions = list(JOBS.values())
+    results, _, _ = calculate_similarity_results([CV] + descriptions)
+
+    scores = JobCorpusIndex.fit(descriptions).score(CV)
+    np.testing.assert_allclose(scores, [result.similarity for result in results], atol=1e-12)
+
+
+def test_score_many_matches_score():
+    index = JobCorpusIndex.fit(list(JOBS.values()))
+    cvs = [CV, "Kubernetes and Terraform on AWS", JOBS["mobile"]]
+
+    similarities, cv_norms = index.score_many(cvs)
+    for cv, row in zip(cvs, similarities):
+        np.testing.assert_allclose(row, index.score(cv), atol=1e-12)
+    assert (cv_norms > 0).all()
+
+
+def test_subset_scores_match_fitting_cv_and_selected_jobs_together():
+    index = JobCorpusIndex.fit(list(JOBS.values()), job_ids=list(JOBS))
+    selected = ["devops", "backend", "mobile"]
+
+    subset, missing = get_job_subset(index, selected + ["backend", "unknown"])
+    assert subset.job_ids == tuple(selected)
+    assert missing == ["unknown"]
+    assert get_job_subset(index, selected + ["unknown"])[0] is subset
+
+    results, _, _ = calculate_similarity_results([CV] + [JOBS[job_id] for job_id in selected])
+    np.testing.assert_allclose(subset.score(CV), [result.similarity for result in results], atol=1e-12)
+
+
+def test_incremental_index_matches_fresh_fit():
+    index = IncrementalJobIndex()
+    index.add_jobs(JOBS.items())
+
+    assert_same_index(index.snapshot(), JobCorpusIndex.fit(list(JOBS.values()), job_ids=list(JOBS)))
+
+
+def test_churned_index_matches_fresh_fit_of_live_jobs():
+    # High ratio so tombstones stay in place until the explicit compact() below
+    index = IncrementalJobIndex(compaction_ratio=1.0)
+    index.add_jobs(JOBS.items())
+    index.snapshot()
+
+    index.remove_jobs(["mobile", "java", "unknown"])
+    index.update_job("data", "Data engineer writing Spark and Airflow pipelines in Scala")
+    index.add_job("ml", "Machine learning engineer using PyTorch and Python")
+    index.remove_job("ml")
+    index.add_job("qa", "QA engineer writing Selenium and Cypress tests")
+
+    live = {
+        "backend": JOBS["backend"],
+        "frontend": JOBS["frontend"],
+        "devops": JOBS["devops"],
+        "data": "Data engineer writing Spark and Airflow pipelines in Scala",
+        "qa": "QA engineer writing Selenium and Cypress tests",
+    }
+    expected = JobCorpusIndex.fit(list(live.values()), job_ids=list(live))
+
+    # Tombstoned rows and words only removed jobs used are still in the matrix here
+    before_compaction = index.snapshot()
+    assert len(before_compaction) == len(live)
+    assert sorted(before_compaction.job_ids) == sorted(live)
+    scores = dict(zip(before_compaction.job_ids, before_compaction.score(CV)))
+    assert scores == pytest.approx(dict(zip(expected.job_ids, expected.score(CV))))
+
+    index.compact()
+    compacted = index.snapshot()
+    assert compacted.tf_matrix.shape == expected.tf_matrix.shape
+    assert_same_index(compacted, expected)
+
+
+def test_compaction_triggers_past_ratio():
+    index = IncrementalJobIndex(compaction_ratio=0.25)
+    index.add_jobs(JOBS.items())
+    index.snapshot()
+
+    index.remove_jobs(["mobile", "java"])
+    snapshot = index.snapshot()
+
+    # Two of six rows tombstoned is past the ratio, so the snapshot was built from a compacted matrix
+    assert snapshot.tf_matrix.shape[0] == len(JOBS) - 2
+    assert "swift" not in snapshot.vocabulary_index
+    assert_same_index(snapshot, JobCorpusIndex.fit(
+        [JOBS[job_id] for job_id in JOBS if job_id not in ("mobile", "java")],
+        job_ids=[job_id for job_id in JOBS if job_id not in ("mobile", "java")]
+    ))
+
+
+def test_snapshots_are_immutable_and_reused():
+    index = IncrementalJobIndex()
+    index.add_jobs(JOBS.items())
+
+    snapshot = index.snapshot()
+    assert index.snapshot() is snapshot
+    with pytest.raises(AttributeError):
+        snapshot.idf = None
+
+    index.remove_job("backend")
+    assert index.snapshot() is not snapshot
+    assert "backend" in snapshot.job_ids
+
+
+def test_results_without_descriptions_print_their_job_id():
+    # Stored jobs are indexed from their term counts, so there's no description to show
+    index = IncrementalJobIndex()
+    index.add_documents([("backend", {"python": 3, "django": 3}, None)])
+
+    result, = match_cv_against_index(CV, index.snapshot())
+    assert result.description is None
+    assert str(result) == f"{result.match_quality}: job backend"
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ml import config, parallel_preprocessing
+from ml.tfidf import preprocess_cache
+from ml.job_ingest import JobIngest
+from ml.job_store import JobStore, hash_job
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    yield store
+    store.close()
+
+
+def job_line(job_id, description):
+    return '{"id": "%s", "title": null, "description": "%s"}\n' % (job_id, description)
+
+
+def test_a_full_ingest_batch_is_tokenised_by_the_preprocessing_pool(store, monkeypatch, request):
+    request.addfinalizer(preprocess_cache.clear)
+
+    # Only the worker count depends on the machine, the batch sizes and threshold are the defaults
+    monkeypatch.setattr(parallel_preprocessing, "preprocess_workers", 2)
+    assert config.job_ingest_batch_size >= config.preprocess_parallel_threshold
+
+    # Threads stand in for the spawned worker processes, the chunks are encoded and decoded the same way
+    pools = []
+    with ThreadPoolExecutor(max_workers=2) as threads:
+        monkeypatch.setattr(parallel_preprocessing, "_get_pool", lambda workers: pools.append(workers) or threads)
+
+        ingest = JobIngest(store)
+        for i in range(config.job_ingest_batch_size):
+            ingest.add_line(job_line(f"job-{i}", f"Python developer number {i} building Django APIs on AWS"))
+
+        assert ingest.batch_ready()
+        ingest.write_batch()
+
+    assert pools == [2]
+    assert ingest.counts["inserted"] == config.job_ingest_batch_size
+    assert len(store) == config.job_ingest_batch_size
+
+
+def test_duplicate_lines_are_dropped_and_changed_content_is_updated(store):
+    store.upsert_jobs([("backend", None, "Senior Python developer building Django APIs"),
+                       ("frontend", None, "React and TypeScript frontend engineer")])
+
+    ingest = JobIngest(store)
+    for line in [
+        job_line("data", "Data scientist using pandas and SQL"),
+        # New id, same content as a job earlier in the feed
+        job_line("data-copy", "Data scientist using pandas and SQL"),
+        # New id, same content as a stored job
+        job_line("backend-copy", "Senior Python developer building Django APIs"),
+        # Stored job sent again as it is
+        job_line("backend", "Senior Python developer building Django APIs"),
+        # Stored job whose content changed
+        job_line("frontend", "React, Next.js and TypeScript frontend engineer"),
+    ]:
+        ingest.add_line(line)
+    ingest.flush()
+
+    assert ingest.counts == {"received": 5, "invalid": 0, "duplicates": 2, "inserted": 1, "updated": 1, "unchanged": 1}
+    assert sorted(store.job_ids()) == ["backend", "data", "frontend"]
+    assert store.stale_job_ids(["frontend"], [hash_job(None, "React and TypeScript frontend engineer")]) == ["frontend"]
+
+
+def test_a_stored_job_is_updated_even_when_another_job_has_its_new_content(store):
+    store.upsert_jobs([("a", None, "Go developer writing gRPC services"),
+                       ("b", None, "Java developer writing Spring services")])
+
+    ingest = JobIngest(store)
+    ingest.add_line(job_line("b", "Go developer writing gRPC services"))
+    ingest.flush()
+
+    assert ingest.counts["duplicates"] == 0
+    assert ingest.counts["updated"] == 1
+    assert store.ids_by_content_hash([hash_job(None, "Go developer writing gRPC services")]) == {
+        hash_job(None, "Go developer writing gRPC services"): {"a", "b"}
+    }
+
+
+def test_chunks_are_split_into_records_across_chunk_boundaries(store):
+    feed = (job_line("a", "Python developer") + "not json\n" + job_line("b", "Rust developer")).rstrip("\n").encode()
+
+    ingest = JobIngest(store)
+    # A record split between chunks, and a last record without a trailing newline
+    for start in range(0, len(feed), 7):
+        ingest.add_chunk(feed[start:start + 7])
+    ingest.flush()
+
+    assert ingest.counts["received"] == 2
+    assert ingest.counts["invalid"] == 1
+    assert ingest.errors and ingest.errors[0].startswith("line 2:")
+    assert sorted(store.job_ids()) == ["a", "b"]
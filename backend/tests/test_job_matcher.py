@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from ml.job_matcher import select_matches
+
+
+def test_top_k_orders_by_similarity_then_job_order():
+    similarities = np.array([0.2, 0.5, 0.2, 0.9, 0.5])
+
+    assert select_matches(similarities, top_k=4).tolist() == [3, 1, 4, 0]
+
+
+def test_ties_at_the_cut_off_keep_the_earliest_jobs():
+    # Large enough for argpartition's selection to shuffle the tied jobs
+    similarities = np.full(5_000, 0.3)
+    similarities[[10, 4_000]] = 0.6
+
+    assert select_matches(similarities, top_k=5).tolist() == [10, 4_000, 0, 1, 2]
+
+
+@pytest.mark.parametrize("min_similarity", [None, 0.2])
+def test_top_k_matches_a_full_stable_sort(min_similarity):
+    rng = np.random.default_rng(0)
+    similarities = rng.choice([0.1, 0.2, 0.3, 0.4], size=5_000)
+
+    positions = np.arange(len(similarities)) if min_similarity is None else np.flatnonzero(similarities >= min_similarity)
+    expected = positions[np.lexsort((positions, -similarities[positions]))]
+
+    for top_k in (1, 7, 1_000, 10_000):
+        assert select_matches(similarities, top_k=top_k, min_similarity=min_similarity).tolist() == expected[:top_k].tolist()
+
+
+def test_min_similarity_alone_keeps_job_order():
+    similarities = np.array([0.2, 0.5, 0.1, 0.9])
+
+    assert select_matches(similarities, min_similarity=0.2).tolist() == [0, 1, 3]
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from ml import job_store, tokenizer
+from ml.tfidf import preprocess_cache
+from ml.job_index import JobCorpusIndex
+from ml.job_store import JobStore
+
+JOBS = {
+    "backend": "Senior Python developer building Django and PostgreSQL APIs on AWS with Docker",
+    "frontend": "React and TypeScript frontend engineer, some Node and GraphQL experience",
+    "data": "Data scientist using Python, pandas, SQL and machine learning, led a small team",
+    "devops": "DevOps engineer running Kubernetes, Terraform and AWS, built CI/CD pipelines",
+}
+
+CV = "Python developer, built Django APIs with PostgreSQL and Docker on AWS, some React"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_snapshot_picks_up_jobs_written_by_another_connection(db_path):
+    api_store = JobStore(db_path)
+    api_store.upsert_jobs((job_id, None, description) for job_id, description in JOBS.items())
+    snapshot = api_store.snapshot()
+
+    # Nothing written elsewhere, the snapshot is reused
+    assert not api_store.refresh()
+    assert api_store.snapshot() is snapshot
+
+    # e.g. the ingest_jobs CLI loading a feed into the same file
+    other_store = JobStore(db_path)
+    other_store.upsert_jobs([("ml", None, "Machine learning engineer using PyTorch and Python"),
+                             ("data", None, "Data engineer writing Spark and Airflow pipelines in Scala")])
+    other_store.remove_jobs(["frontend"])
+    other_store.close()
+
+    live = {
+        "backend": JOBS["backend"],
+        "devops": JOBS["devops"],
+        "data": "Data engineer writing Spark and Airflow pipelines in Scala",
+        "ml": "Machine learning engineer using PyTorch and Python",
+    }
+    refreshed = api_store.snapshot()
+    assert sorted(refreshed.job_ids) == sorted(live)
+
+    expected = JobCorpusIndex.fit(list(live.values()), job_ids=list(live))
+    scores = dict(zip(refreshed.job_ids, refreshed.score(CV)))
+    assert scores == pytest.approx(dict(zip(expected.job_ids, expected.score(CV))))
+
+    api_store.close()
+
+
+def test_changing_a_weight_reprocesses_stored_jobs(db_path, monkeypatch, request):
+    # Don't leave term counts from the changed weights behind for other tests
+    request.addfinalizer(preprocess_cache.clear)
+
+    store = JobStore(db_path)
+    store.upsert_jobs([("backend", None, JOBS["backend"])])
+    store.close()
+
+    # Skills counting x4 instead of x3 gives different term counts for the same description
+    monkeypatch.setattr(tokenizer, "skill_weight", tokenizer.skill_weight + 1)
+    term_table = tokenizer._build_term_table()
+    new_version = job_store._preprocess_version(term_table)
+    assert new_version != job_store.preprocess_version
+
+    monkeypatch.setattr(tokenizer, "term_table", term_table)
+    monkeypatch.setattr(job_store, "preprocess_version", new_version)
+    # A new version only ever appears after a restart, when the preprocess cache starts out empty
+    preprocess_cache.clear()
+
+    repreprocessed = []
+    original = JobStore._repreprocess
+    monkeypatch.setattr(JobStore, "_repreprocess", lambda self: repreprocessed.append(True) or original(self))
+
+    store = JobStore(db_path)
+    assert repreprocessed
+    stored = store._db.execute("SELECT term_counts FROM jobs WHERE job_id = 'backend'").fetchone()[0]
+    assert json.loads(stored)["python"] == 4
+    store.close()
+
+    # Opened again with the same version, nothing is reprocessed
+    repreprocessed.clear()
+    JobStore(db_path).close()
+    assert not repreprocessed
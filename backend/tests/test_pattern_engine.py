@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from ml.config import experience_indicators
+from ml.pattern_engine import extract_contact_info, extract_education_info, extract_experience_indicators
+from ml.patterns import contact_patterns, education_patterns, experience_patterns
+
+CVS = [
+    """Jane Smith
+jane.smith@example.co.uk | +44 7700 900123 | linkedin.com/in/jane-smith | github.com/janesmith
+
+Experience
+Worked as a backend engineer at Acme Ltd. 5+ years of experience building Django APIs.
+Experienced in PostgreSQL, Redis and AWS. 3 years working with Kubernetes.
+
+Education
+BSc Computer Science, University of Leeds. A-Level Maths and Physics.
+""",
+    """JOHN DOE  -  john_doe+cv@mail.example.com  -  (020) 7946 0958
+Contact me at second.address@example.org or on 07700 900456
+github.com/jdoe and linkedin.com/in/jdoe-dev
+
+Work at Initech as a data engineer. 10 years experience with Spark. Master of Data Science, College of Arts.
+""",
+    "No contact details here, just a line about my work as a carpenter.",
+]
+
+
+def legacy_contact_info(text):
+    """The original extraction: findall per pattern, keeping the first result"""
+    contact_info = {}
+    for info_type, pattern in contact_patterns.items():
+        matches = re.findall(pattern, text)
+        if matches:
+            contact_info[info_type] = matches[0]
+    return contact_info
+
+
+@pytest.mark.parametrize("text", CVS)
+def test_contact_info_matches_the_original_extraction(text):
+    contact_info = extract_contact_info(text)
+    legacy = legacy_contact_info(text)
+
+    # The phone pattern has a capture group (the country code), which findall returned instead of the number
+    assert contact_info.keys() == legacy.keys()
+    assert {key: value for key, value in contact_info.items() if key != "phone"} == \
+           {key: value for key, value in legacy.items() if key != "phone"}
+
+    if "phone" in contact_info:
+        assert contact_info["phone"] == re.search(contact_patterns["phone"], text).group(0)
+
+
+def test_first_of_each_contact_detail_is_returned():
+    contact_info = extract_contact_info(CVS[1])
+
+    assert contact_info == {
+        "email": "john_doe+cv@mail.example.com",
+        "phone": "(020) 7946 0958",
+        "linkedin": "linkedin.com/in/jdoe-dev",
+        "github": "github.com/jdoe",
+    }
+
+
+@pytest.mark.parametrize("text", CVS)
+def test_experience_and_education_scans_match_findall_per_pattern(text):
+    # One combined scan per family, grouped by pattern in list order, like running each pattern separately
+    experience = [value for pattern in experience_patterns for value in re.findall(pattern, text, re.IGNORECASE)]
+    education = [value for pattern in education_patterns for value in re.findall(pattern, text, re.IGNORECASE)]
+
+    # Followed by the single-word indicators
+    experience += [word for word in text.split(" ") if word in experience_indicators]
+
+    assert extract_experience_indicators(text) == experience
+    assert extract_education_info(text) == education
@@ -0,0 +1,44 @@
+import pytest
+
+from ml.skill_matcher import skill_matcher
+
+
+def skills_in(text):
+    return {match.skill for match in skill_matcher.find_all(text)}
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Five years of C# and SQL Server", "c#"),
+    ("Built services on .NET 6", ".net"),
+    ("Rewrote the billing API in Go.", "go"),
+    ("Go, Rust and Python", "go"),
+])
+def test_skills_ending_or_starting_in_punctuation_are_found(text, skill):
+    assert skill in skills_in(text)
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Worked at Google on search ranking", "go"),
+    ("Cafe Manager, then barista trainer", "c"),
+    ("Argos store supervisor", "go"),
+])
+def test_skills_inside_other_words_are_not_found(text, skill):
+    assert skill not in skills_in(text)
+
+
+def test_offsets_point_into_the_original_text():
+    # "İ" lowercases to two characters, which must not shift the offsets of everything after it
+    text = "İzmir İİ office, Python and C# developer"
+
+    spans = {match.skill: text[match.start:match.end] for match in skill_matcher.find_all(text)}
+
+    assert spans["python"] == "Python"
+    assert spans["c#"] == "C#"
+
+
+def test_skills_are_listed_once_per_category_in_order_of_first_occurrence():
+    skills = skill_matcher.find_by_category("Docker, Python, Django, docker again and python 3")
+
+    assert skills["programming_languages"] == ["Python"]
+    assert skills["frameworks_libraries"] == ["Django"]
+    assert skills["cloud_tools"] == ["Docker"]
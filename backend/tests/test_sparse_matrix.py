@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from ml.sparse_matrix import CSRMatrix
+from ml.tfidf import TFIDFFromScratch
+
+
+def random_sparse(rng, n_rows, n_cols, density=0.3):
+    """Dense array with mostly zeros (including empty rows and columns) and the same matrix as a CSRMatrix"""
+    dense = rng.random((n_rows, n_cols)) * (rng.random((n_rows, n_cols)) < density)
+    rows = [{column: dense[row, column] for column in np.flatnonzero(dense[row])} for row in range(n_rows)]
+    return dense, CSRMatrix.from_rows(rows, n_cols)
+
+
+@pytest.fixture(params=[(1, 1), (5, 3), (12, 40), (40, 7), (0, 5)], ids=lambda shape: f"{shape[0]}x{shape[1]}")
+def matrices(request):
+    rng = np.random.default_rng(sum(request.param))
+    return rng, *random_sparse(rng, *request.param)
+
+
+def test_from_rows_matches_dense(matrices):
+    _, dense, matrix = matrices
+    np.testing.assert_array_equal(matrix.toarray(), dense)
+    assert matrix.nnz == np.count_nonzero(dense)
+    for i in range(len(matrix)):
+        np.testing.assert_array_equal(matrix[i], dense[i])
+
+
+def test_dot_and_row_norms_match_dense(matrices):
+    rng, dense, matrix = matrices
+    vector = rng.random(matrix.shape[1])
+    np.testing.assert_allclose(matrix.dot(vector), dense @ vector)
+    np.testing.assert_allclose(matrix.row_norms(), np.linalg.norm(dense, axis=1))
+
+
+def test_transpose_matches_dense(matrices):
+    _, dense, matrix = matrices
+    np.testing.assert_array_equal(matrix.transpose().toarray(), dense.T)
+
+
+def test_matmul_transpose_matches_dense(matrices):
+    rng, dense, matrix = matrices
+    other_dense, other = random_sparse(rng, 9, matrix.shape[1])
+    np.testing.assert_allclose(matrix.matmul_transpose(other.transpose()), dense @ other_dense.T, atol=1e-12)
+
+
+def test_scale_columns_and_select_rows_match_dense(matrices):
+    rng, dense, matrix = matrices
+    weights = rng.random(matrix.shape[1])
+    np.testing.assert_allclose(matrix.scale_columns(weights).toarray(), dense * weights)
+
+    rows = rng.integers(0, len(matrix), size=2 * len(matrix)) if len(matrix) else np.array([], dtype=np.int64)
+    np.testing.assert_array_equal(matrix.select_rows(rows).toarray(), dense[rows])
+
+
+def test_vstack_widens_and_stacks(matrices):
+    rng, dense, matrix = matrices
+    other_dense, other = random_sparse(rng, 4, matrix.shape[1] + 3)
+    stacked = CSRMatrix.vstack([matrix, other], matrix.shape[1] + 3)
+
+    widened = np.hstack([dense, np.zeros((dense.shape[0], 3))])
+    np.testing.assert_array_equal(stacked.toarray(), np.vstack([widened, other_dense]))
+
+
+def test_frozen_matrix_is_read_only(matrices):
+    _, _, matrix = matrices
+    matrix.freeze()
+    with pytest.raises(ValueError):
+        matrix.data[:1] = 1.0
+
+
+def test_tfidf_sparse_matches_dense_definition():
+    documents = [
+        "Senior Python developer building Django and PostgreSQL APIs on AWS",
+        "React and TypeScript frontend engineer, some Node and AWS experience",
+        "Data scientist using Python, pandas and machine learning, led a team",
+    ]
+    tfidf = TFIDFFromScratch(cache=None)
+    matrix = tfidf.calculate_tfidf_sparse(documents)
+
+    # TF-IDF written out densely from the definitions
+    expected = np.zeros(matrix.shape)
+    for row, document in enumerate(tfidf.documents):
+        total = sum(document.values())
+        for word, count in document.items():
+            document_frequency = sum(word in other for other in tfidf.documents)
+            expected[row, tfidf.vocabulary_index[word]] = count / total * math.log(len(documents) / document_frequency)
+
+    np.testing.assert_allclose(matrix.toarray(), expected)
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+import main
+from main import UploadSizeLimitMiddleware
+
+LIMIT = 1024
+
+
+@pytest.fixture
+def upload_app():
+    app = FastAPI()
+    app.state.reached = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        app.state.reached.append(file.filename)
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, paths=["/upload"], max_body_bytes=LIMIT)
+    return app
+
+
+def multipart_body(content: bytes):
+    boundary = "limit-test"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"cv.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def chunked(body: bytes, size: int = 256):
+    # A generator body is sent with Transfer-Encoding: chunked, no Content-Length
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def test_uploads_within_the_limit_reach_the_endpoint(upload_app):
+    body, headers = multipart_body(b"%PDF-" + b"x" * 500)
+
+    response = TestClient(upload_app).post("/upload", content=body, headers=headers)
+
+    assert response.status_code == 200
+    assert upload_app.state.reached == ["cv.pdf"]
+
+
+def test_a_declared_content_length_over_the_limit_is_rejected_unread(upload_app):
+    body, headers = multipart_body(b"%PDF-" + b"x" * 2 * LIMIT)
+
+    response = TestClient(upload_app).post("/upload", content=body, headers=headers)
+
+    assert response.status_code == 413
+    assert response.json()["detail"].startswith("File size too large")
+    assert upload_app.state.reached == []
+
+
+def test_a_chunked_body_is_rejected_once_it_passes_the_limit(upload_app):
+    body, headers = multipart_body(b"%PDF-" + b"x" * 2 * LIMIT)
+
+    response = TestClient(upload_app).post("/upload", content=chunked(body), headers=headers)
+
+    assert response.status_code == 413
+    assert upload_app.state.reached == []
+
+
+def test_other_paths_are_not_limited(upload_app):
+    @upload_app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    body, headers = multipart_body(b"x" * 2 * LIMIT)
+
+    assert TestClient(upload_app).post("/other", content=body, headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_analyze_rejects_a_pdf_over_max_upload_bytes(monkeypatch, streamed):
+    # Within the middleware's allowance for multipart overhead, so the endpoint's own chunked read catches it
+    monkeypatch.setattr(main, "max_upload_bytes", 1_000)
+    body, headers = multipart_body(b"%PDF-1.4\n" + b"x" * 2_000)
+
+    response = TestClient(main.app).post("/api/cv/analyze", content=chunked(body) if streamed else body, headers=headers)
+
+    assert response.status_code == 413
@@ -5,6 +5,72 @@ import { db } from "@/lib";
 import { cvAnalyses, jobSimilarities } from "@/db/schema";
 import { eq } from "drizzle-orm";
 import { revalidatePath } from "next/cache";
+import { createHash } from "crypto";
+
+const FASTAPI_URL = "http://localhost:8000";
+
+type JobText = { id: number; title: string; description: string };
+
+// Same as hash_job in the backend's job store, so it can tell when its copy of a job is out of date
+function hashJob(job: JobText) {
+  return createHash("sha256").update(`${job.title ?? ""}\u0000${job.description}`).digest("hex");
+}
+
+// Matches against the jobs the backend already stores, only the job ids (and their content hashes) are sent
+async function requestJobMatches(cvAnalysis: unknown, jobsToMatch: JobText[]) {
+  return fetch(`${FASTAPI_URL}/api/match-job`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      cv_analysis: cvAnalysis,
+      job_ids: jobsToMatch.map(job => job.id),
+      job_content_hashes: jobsToMatch.map(hashJob),
+    }),
+  });
+}
+
+// Sends the full text of jobs the backend hasn't stored yet or has an outdated copy of
+async function syncJobsToBackend(jobsToSync: JobText[]) {
+  return fetch(`${FASTAPI_URL}/api/jobs`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      jobs: jobsToSync.map(job => ({
+        job_id: job.id,
+        title: job.title,
+        description: job.description,
+      })),
+    }),
+  });
+}
+
+// Removes jobs deleted from the database from the backend's job store, so they stop counting in its matches
+async function removeDeletedJobsFromBackend(jobIds: number[]) {
+  const storedResponse = await fetch(`${FASTAPI_URL}/api/jobs`);
+  if (!storedResponse.ok) {
+    return storedResponse;
+  }
+
+  const currentIds = new Set(jobIds);
+  const { job_ids: storedIds } = await storedResponse.json();
+  const deletedIds = storedIds.filter((id: number) => !currentIds.has(id));
+
+  if (deletedIds.length === 0) {
+    return storedResponse;
+  }
+
+  return fetch(`${FASTAPI_URL}/api/jobs/remove`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ job_ids: deletedIds }),
+  });
+}
 
 export async function matchJobs() {
   try {
@@ -37,7 +103,9 @@ export async function matchJobs() {
       };
     }
 
-    const allJobs = await db.query.jobs.findMany();
+    const allJobs = await db.query.jobs.findMany({
+      columns: { id: true, title: true, description: true },
+    });
 
     if (allJobs.length === 0) {
       return {
@@ -46,18 +114,40 @@ export async function matchJobs() {
       };
     }
 
-    const jobDescriptions = allJobs.map(job => job.description);
-
-    const fastApiResponse = await fetch("http://localhost:8000/api/match-job", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        cv_analysis: userCvAnalysis.analysisData,
-        job_descriptions: jobDescriptions,
-      }),
-    });
+    const removeResponse = await removeDeletedJobsFromBackend(allJobs.map(job => job.id));
+
+    if (!removeResponse.ok) {
+      const errorData = await removeResponse.json();
+      return {
+        success: false,
+        error: "Failed to sync jobs with the matching service",
+        details: errorData,
+      };
+    }
+
+    let fastApiResponse = await requestJobMatches(userCvAnalysis.analysisData, allJobs);
+    let matchData = fastApiResponse.ok ? await fastApiResponse.json() : null;
+
+    // Jobs the backend hasn't stored yet or has an outdated copy of are synced once, then matched again
+    const outOfSyncIds = new Set<number>(
+      matchData ? [...matchData.missing_job_ids, ...matchData.stale_job_ids] : []
+    );
+
+    if (outOfSyncIds.size > 0) {
+      const syncResponse = await syncJobsToBackend(allJobs.filter(job => outOfSyncIds.has(job.id)));
+
+      if (!syncResponse.ok) {
+        const errorData = await syncResponse.json();
+        return {
+          success: false,
+          error: "Failed to sync jobs with the matching service",
+          details: errorData,
+        };
+      }
+
+      fastApiResponse = await requestJobMatches(userCvAnalysis.analysisData, allJobs);
+      matchData = fastApiResponse.ok ? await fastApiResponse.json() : null;
+    }
 
     if (!fastApiResponse.ok) {
       const errorData = await fastApiResponse.json();
@@ -68,7 +158,7 @@ export async function matchJobs() {
       };
     }
 
-    const { results } = await fastApiResponse.json();
+    const { results } = matchData;
 
     if (results.length !== allJobs.length) {
       return {
@@ -79,7 +169,7 @@ export async function matchJobs() {
 
     const similarityRecords = results.map((result: any) => ({
       userId: userId,
-      jobId: allJobs[result.job_index - 1].id,
+      jobId: result.job_id,
       similarity: result.similarity.toString(),
       matchQuality: result.match_quality,
     }));
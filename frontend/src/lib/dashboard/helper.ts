@@ -69,31 +69,20 @@ export const getUserInfo = async (userId: string) => {
 }
 
 export const getMatchDistribution = async (userId: string) => {
+  // Bucketed by the match quality label the backend gave each result, so its thresholds aren't repeated here
   const similarities = await db
-    .select({ similarity: jobSimilarities.similarity })
+    .select({ matchQuality: jobSimilarities.matchQuality })
     .from(jobSimilarities)
     .where(eq(jobSimilarities.userId, userId));
 
-  const values = similarities.map(row => row.similarity);
-  
-  const excellent = values.filter((value) => parseFloat(value) >= 0.35).length;
+  const values = similarities.map(row => row.matchQuality);
+  const countOf = (matchQuality: string) => values.filter((value) => value === matchQuality).length;
 
-  const good = values.filter((value) => {
-    const num = parseFloat(value);
-    return num >= 0.28 && num <= 0.34;
-  }).length;
-
-  const ok = values.filter((value) => {
-    const num = parseFloat(value);
-    return num >= 0.20 && num <= 0.27;
-  }).length;
-
-  const bad = values.filter((value) => {
-    const num = parseFloat(value);
-    return num >= 0.12 && num <= 0.19;
-  }).length;
-
-  const terrible = values.filter((value) => parseFloat(value) <= 0.11).length
+  const excellent = countOf("Excellent Match");
+  const good = countOf("Strong Match");
+  const ok = countOf("Good Match");
+  const bad = countOf("Moderate Match");
+  const terrible = countOf("Weak Match");
 
   const totalCount = values.length
 